@@ -0,0 +1,205 @@
+"""
+AI Cache Module
+
+This module provides disk-backed caches in front of the models: a completion
+cache for the LLM, so that replaying identical work (e.g. re-running a batch
+after a crash) costs nothing and returns instantly, and a chunk-hash keyed
+embedding cache, so that re-indexing only embeds new or changed chunks.
+"""
+
+import json
+import hashlib
+from array import array
+from typing import Any, List, Optional
+
+from llama_index.core.base.llms.types import CompletionResponse
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from python_backend.config import (
+    logger, LLM_CACHE_ENABLED, LLM_CACHE_BYPASS, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES,
+    EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH
+)
+from python_backend.utils.cache import SQLiteCache
+
+llm_cache = SQLiteCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES)
+# Float vectors barely compress; favour speed
+embedding_cache = SQLiteCache(EMBEDDING_CACHE_PATH, compress_level=1)
+
+
+class CachedLLM:
+    """
+    Wrapper around a LlamaIndex LLM that caches `complete` / `acomplete`.
+
+    Keys combine the model name, its generation settings and the SHA-256 of
+    the prompt. Every other attribute is forwarded to the wrapped LLM.
+    """
+
+    def __init__(self, llm, cache: SQLiteCache = llm_cache,
+                 enabled: bool = LLM_CACHE_ENABLED, bypass: bool = LLM_CACHE_BYPASS):
+        self._llm = llm
+        self._cache = cache
+        self._enabled = enabled
+        self._bypass = bypass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+
+    @property
+    def wrapped(self):
+        """The underlying LLM."""
+        return self._llm
+
+    def _cache_key(self, prompt: str, kwargs: dict) -> str:
+        """Key from model name, generation settings and prompt hash."""
+        generation_config = {
+            "model": getattr(self._llm, "model", None),
+            "temperature": getattr(self._llm, "temperature", None),
+            "max_tokens": getattr(self._llm, "max_tokens", None),
+            "generation_config": getattr(self._llm, "_generation_config", None),
+            "call_kwargs": kwargs,
+        }
+        config_json = json.dumps(generation_config, sort_keys=True, default=str)
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{config_json}|{prompt_hash}".encode("utf-8")).hexdigest()
+
+    def _use_cache(self, use_cache: bool) -> bool:
+        return self._enabled and use_cache and not self._bypass
+
+    def _lookup(self, key: str):
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        logger.info(f"LLM cache hit ({self._cache.stats()})")
+        return CompletionResponse(text=json.loads(cached)["text"])
+
+    def _store(self, key: str, response) -> None:
+        self._cache.set(key, json.dumps({"text": response.text}).encode("utf-8"))
+
+    def complete(self, prompt: str, use_cache: bool = True, **kwargs):
+        """
+        Complete a prompt, serving byte-identical requests from the cache.
+
+        Args:
+            prompt: The prompt.
+            use_cache: Set to False to always call the model (the response is still stored).
+            **kwargs: Forwarded to the wrapped LLM.
+
+        Returns:
+            CompletionResponse.
+        """
+        key = self._cache_key(prompt, kwargs)
+        if self._use_cache(use_cache):
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+        response = self._llm.complete(prompt, **kwargs)
+        if self._enabled:
+            self._store(key, response)
+        return response
+
+    async def acomplete(self, prompt: str, use_cache: bool = True, **kwargs):
+        """Async version of `complete`."""
+        key = self._cache_key(prompt, kwargs)
+        if self._use_cache(use_cache):
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+        response = await self._llm.acomplete(prompt, **kwargs)
+        if self._enabled:
+            self._store(key, response)
+        return response
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that caches vectors by model name and text hash.
+
+    It is a regular LlamaIndex embedding model, so index builders use it
+    transparently; only texts missing from the cache reach the wrapped model,
+    still batched by its embed_batch_size.
+    """
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: SQLiteCache = PrivateAttr()
+    _enabled: bool = PrivateAttr()
+
+    def __init__(self, embed_model: BaseEmbedding, cache: SQLiteCache = embedding_cache,
+                 enabled: bool = EMBEDDING_CACHE_ENABLED, **kwargs: Any):
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs,
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+        self._enabled = enabled
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _cache_key(self, kind: str, text: str) -> str:
+        """Key from model name, embedding kind (text/query) and text hash."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{text_hash}"
+
+    def _load(self, key: str) -> Optional[List[float]]:
+        if not self._enabled:
+            return None
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        return array("f", cached).tolist()
+
+    def _store(self, key: str, embedding: List[float]) -> None:
+        if self._enabled:
+            self._cache.set(key, array("f", embedding).tobytes())
+
+    def _split_cached(self, texts: List[str]):
+        """Cached embeddings (None where missing) and the indexes that still need embedding."""
+        keys = [self._cache_key("text", text) for text in texts]
+        embeddings = [self._load(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        return keys, embeddings, missing
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys, embeddings, missing = self._split_cached(texts)
+        if missing:
+            new_embeddings = self._embed_model.get_text_embedding_batch([texts[i] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+                self._store(keys[i], embedding)
+        logger.debug(f"Embedded {len(missing)} of {len(texts)} chunks ({self._cache.stats()})")
+        return embeddings
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys, embeddings, missing = self._split_cached(texts)
+        if missing:
+            new_embeddings = await self._embed_model.aget_text_embedding_batch([texts[i] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+                self._store(keys[i], embedding)
+        return embeddings
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        key = self._cache_key("query", query)
+        embedding = self._load(key)
+        if embedding is None:
+            embedding = self._embed_model.get_query_embedding(query)
+            self._store(key, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        key = self._cache_key("query", query)
+        embedding = self._load(key)
+        if embedding is None:
+            embedding = await self._embed_model.aget_query_embedding(query)
+            self._store(key, embedding)
+        return embedding
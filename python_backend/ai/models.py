@@ -10,6 +10,7 @@ from llama_index.core import Settings, VectorStoreIndex
 from llama_index.core.node_parser import SentenceSplitter
 
 from python_backend.config import GCP_PROJECT_ID, GCP_LOCATION, logger
+from python_backend.ai.cache import CachedLLM, CachedEmbedding
 from google.generativeai import types
 
 # Vertex AI configuration
@@ -25,7 +26,7 @@ vertexai_config = {
 #     stop_sequences=None
 # )
 
-llm = GoogleGenAI(
+base_llm = GoogleGenAI(
     model="gemini-2.0-flash",
     vertexai_config=vertexai_config,
     context_window=200000,  # max input tokens for the model
@@ -33,14 +34,49 @@ llm = GoogleGenAI(
     # generation_config=config
 )
 
+# Completion calls go through the persistent response cache
+llm = CachedLLM(base_llm)
+
+
+_structured_llms = {}
+
+def get_structured_llm(response_schema: dict) -> CachedLLM:
+    """
+    Get an LLM that answers with JSON constrained to a response schema.
+    
+    Args:
+        response_schema: Gemini response schema (see storage.bigquery.schema_to_response_schema).
+        
+    Returns:
+        A cached GoogleGenAI instance configured for structured output (one per schema).
+    """
+    import json
+    from google.genai import types as genai_types
+
+    schema_key = json.dumps(response_schema, sort_keys=True)
+    if schema_key not in _structured_llms:
+        _structured_llms[schema_key] = CachedLLM(GoogleGenAI(
+            model=base_llm.model,
+            vertexai_config=vertexai_config,
+            context_window=200000,
+            max_tokens=8000,  # one response carries every analysis field
+            generation_config=genai_types.GenerateContentConfig(
+                temperature=0,
+                response_mime_type="application/json",
+                response_schema=response_schema,
+            ),
+        ))
+    return _structured_llms[schema_key]
+
 
 # Embedding model
-embed_model = GoogleGenAIEmbedding(
+# Only chunks missing from the embedding cache are sent to the API
+embed_model = CachedEmbedding(GoogleGenAIEmbedding(
     model_name="text-embedding-005",  # Using 005 since it's the latest model
     # For multilingual text, use: "text-multilingual-embedding-002"
     embed_batch_size=10,
     vertexai_config=vertexai_config
-)
+))
 
 # Set the embedding dimension for reference
 # EMBED_DIMENSION = 768  # text-embedding-005 has 768 dimensions
@@ -51,7 +87,7 @@ text_splitter = SentenceSplitter(chunk_size=400, chunk_overlap=40)  # Smaller ch
 # Set global settings for LlamaIndex
 def initialize_llama_settings():
     """Initialize global LlamaIndex settings with our models"""
-    Settings.llm = llm
+    Settings.llm = base_llm
     Settings.embed_model = embed_model
     Settings.text_splitter = text_splitter
     # logger.info("LlamaIndex settings initialized with Google AI models")
@@ -0,0 +1,129 @@
+"""
+Benchmark of the project fetch transforms.
+
+Compares the row-by-row path (bigquery.Row -> dict -> transform per row)
+with the columnar path (Arrow table -> column-wise transform) on synthetic
+final_results_engagement rows, and optionally on the live table.
+
+Usage:
+    python -m python_backend.api.benchmark_projects_transform [--sizes 1000 10000 100000] [--live]
+"""
+
+import time
+import random
+import argparse
+from typing import Any, Dict, List
+
+import pyarrow as pa
+
+from python_backend.api.projects_api import (
+    client, get_projects_table_id, rows_to_projects, arrow_to_projects, build_projects_query,
+)
+
+
+class SyntheticRow:
+    """Stand-in for bigquery.Row: repeated RECORDs hold Row-like items."""
+
+    def __init__(self, values: Dict[str, Any]):
+        self._values = {
+            key: [SyntheticRow(item) for item in value] if isinstance(value, list) else value
+            for key, value in values.items()
+        }
+
+    def items(self):
+        return self._values.items()
+
+    def keys(self):
+        return self._values.keys()
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+
+def make_rows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic rows with the shape and rough text sizes of final_results_engagement."""
+    rng = random.Random(seed)
+    text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+    rows = []
+    for i in range(count):
+        rows.append({
+            "file_id": f"gs://bucket/fa/{i:07d}.pdf",
+            "Engagement_Description": f"Engagement {i}",
+            "Legal_Agreement": f"LA-{i}",
+            "File_URL": f"https://drive.google.com/file/d/{i}",
+            "Region": rng.choice(["Africa", "Asia", "Europe", "Americas"]),
+            "Hub": rng.choice(["Nairobi", "Bangkok", "Geneva", "Panama"]),
+            "Donor_Description": rng.choice(["Donor A", "Donor B", "Donor C"]),
+            "Project_Manager_Name": "Jane Doe",
+            "Project_Manager_Email_Address": "jane@example.com",
+            "Deputy_Project_Manager_Name": "John Doe",
+            "Deputy_Project_Manager_Email_Address": "john@example.com",
+            "project_summary": text,
+            "objectives": text,
+            "problems_addressed": text,
+            "beneficiaries_and_impacted_groups": text,
+            "anticipated_outcomes_short_and_long_term": text,
+            "quantifiable_outcome_list": [{"outcome_item": f"Outcome {j}"} for j in range(rng.randint(0, 5))],
+            "sdg_goals": [
+                {"sdg_goal": str(rng.randint(1, 17)), "name": "Goal", "relevance": text[:120]}
+                for _ in range(rng.randint(1, 3))
+            ],
+            "sdg_indicators": [
+                {"sdg_indicator": f"{rng.randint(1, 17)}.1.1", "description": text[:120], "measurability": text[:120]}
+                for _ in range(rng.randint(0, 4))
+            ],
+            "remote_sensing_tools": [
+                {"technology": rng.choice(["SAR", "Optical", "LiDAR"]), "relevance_justification": text[:200],
+                 "project_description_context": text[:200]}
+                for _ in range(rng.randint(0, 3))
+            ],
+        })
+    return rows
+
+
+def _timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def benchmark_synthetic(sizes: List[int]) -> None:
+    """Time both transforms on synthetic rows of each size."""
+    for size in sizes:
+        data = make_rows(size)
+        rows = [SyntheticRow(row) for row in data]
+        table = pa.Table.from_pylist(data)
+        if rows_to_projects(rows[:100]) != arrow_to_projects(table.slice(0, 100)):
+            raise AssertionError("Row and columnar transforms disagree")
+
+        row_seconds = _timed(rows_to_projects, rows)
+        arrow_seconds = _timed(arrow_to_projects, table)
+        print(f"{size:>7} rows: rows {row_seconds * 1000:8.1f} ms | "
+              f"columnar {arrow_seconds * 1000:8.1f} ms | speedup {row_seconds / arrow_seconds:4.1f}x")
+
+
+def benchmark_live() -> None:
+    """Time both full fetch paths (query + download + transform) on the live table."""
+    query, _ = build_projects_query()
+
+    start = time.perf_counter()
+    projects = rows_to_projects(client.query(query).result())
+    row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    projects_columnar = arrow_to_projects(client.query(query).to_arrow(create_bqstorage_client=True))
+    arrow_seconds = time.perf_counter() - start
+
+    print(f"{get_projects_table_id()} ({len(projects)} rows): rows {row_seconds * 1000:.1f} ms | "
+          f"columnar {arrow_seconds * 1000:.1f} ms | same output: {projects == projects_columnar}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the project fetch transforms")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--live", action="store_true", help="Also benchmark against the BigQuery table")
+    args = parser.parse_args()
+
+    benchmark_synthetic(args.sizes)
+    if args.live:
+        benchmark_live()
@@ -0,0 +1,67 @@
+"""
+Benchmark of the /api/projects response path.
+
+Compares FastAPI's default serialization (jsonable_encoder + stdlib json,
+as JSONResponse renders it) with orjson, and the payload size without
+compression, with gzip and with brotli (if installed), on synthetic projects.
+The synthetic texts are repetitive, so compression ratios on real data are lower.
+
+Usage:
+    python -m python_backend.api.benchmark_responses [--sizes 1000 10000]
+"""
+
+import gzip
+import time
+import argparse
+from typing import Callable, List
+
+import pyarrow as pa
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from python_backend.api.projects_api import arrow_to_projects, encode_json
+from python_backend.api.benchmark_projects_transform import make_rows
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _best_of(func: Callable, repeat: int = 3) -> float:
+    """Fastest of `repeat` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def benchmark_responses(sizes: List[int]) -> None:
+    for size in sizes:
+        projects = arrow_to_projects(pa.Table.from_pylist(make_rows(size)))
+
+        stdlib_body = JSONResponse(content=None).render(jsonable_encoder(projects))
+        orjson_body, _ = encode_json(projects)
+        stdlib_ms = _best_of(lambda: JSONResponse(content=None).render(jsonable_encoder(projects)))
+        orjson_ms = _best_of(lambda: encode_json(projects))
+
+        print(f"{size} projects")
+        print(f"  serialize: stdlib {stdlib_ms:8.1f} ms | orjson + ETag {orjson_ms:8.1f} ms "
+              f"| speedup {stdlib_ms / orjson_ms:4.1f}x")
+        payload_sizes = {
+            "raw": len(orjson_body),
+            "gzip": len(gzip.compress(orjson_body, compresslevel=9)),
+        }
+        if brotli is not None:
+            payload_sizes["brotli"] = len(brotli.compress(orjson_body, quality=4))
+        print("  payload:   " + " | ".join(f"{name} {length / 1024:8.0f} KB" for name, length in payload_sizes.items())
+              + f" | stdlib raw {len(stdlib_body) / 1024:8.0f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the projects response path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    benchmark_responses(args.sizes)
@@ -0,0 +1,91 @@
+"""
+Streaming writers for the project export endpoint.
+
+Each writer consumes an iterator of batches and yields encoded chunks as
+soon as a batch is written, so memory stays bounded by one batch however
+many projects are exported.
+"""
+
+import io
+import csv
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import orjson
+
+
+def _dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def write_ndjson(project_batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """One JSON object per line."""
+    for projects in project_batches:
+        if projects:
+            yield b"".join(_dumps(project) + b"\n" for project in projects)
+
+
+def write_csv(project_batches: Iterable[List[Dict[str, Any]]], fields: Tuple[str, ...]) -> Iterator[bytes]:
+    """CSV with one column per field; lists and records are written as JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for projects in project_batches:
+        for project in projects:
+            writer.writerow([
+                _dumps(value).decode("utf-8") if isinstance(value, (list, dict)) else value
+                for value in (project.get(name) for name in fields)
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands out what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def write_parquet(record_batches: Iterable, empty_schema=None) -> Iterator[bytes]:
+    """
+    Parquet file streamed one row group per batch.
+
+    Args:
+        record_batches: pyarrow.RecordBatches sharing one schema
+        empty_schema: pyarrow.Schema to write if there are no batches
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    for batch in record_batches:
+        if writer is None:
+            writer = pq.ParquetWriter(sink, batch.schema, compression="zstd")
+        writer.write_batch(batch)
+        yield sink.drain()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, empty_schema if empty_schema is not None else pa.schema([]))
+    writer.close()
+    yield sink.drain()
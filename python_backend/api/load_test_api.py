@@ -0,0 +1,80 @@
+"""
+Small load test for the projects API.
+
+Fires concurrent GET requests at an endpoint and reports latency
+percentiles, so the effect of caching and threadpool offload can be
+compared under concurrency.
+
+Usage:
+    python load_test_api.py [URL] [--requests N] [--concurrency C]
+
+Defaults to http://localhost:8000/api/projects, 200 requests, concurrency 20.
+"""
+
+import sys
+import math
+import time
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+
+def timed_get(url: str, timeout: float) -> float:
+    """GET a URL, read the whole body and return the latency in seconds."""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def run_load_test(url: str, total_requests: int, concurrency: int, timeout: float = 60) -> Dict[str, float]:
+    """
+    Send `total_requests` GET requests with `concurrency` requests in flight.
+
+    Returns:
+        Dict with request/error counts, throughput and p50/p90/p99/max latency in milliseconds
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(timed_get, url, timeout) for _ in range(total_requests)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"Request failed: {str(e)}")
+    elapsed = time.perf_counter() - start
+
+    stats = {"requests": total_requests, "errors": errors, "requests_per_s": total_requests / elapsed}
+    if latencies:
+        stats.update({
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p90_ms": percentile(latencies, 90) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": max(latencies) * 1000,
+        })
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the projects API")
+    parser.add_argument("url", nargs="?", default="http://localhost:8000/api/projects")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"GET {args.url}: {args.requests} requests, concurrency {args.concurrency}")
+    stats = run_load_test(args.url, args.requests, args.concurrency)
+    for name, value in stats.items():
+        print(f"- {name}: {value:.1f}" if isinstance(value, float) else f"- {name}: {value}")
+    sys.exit(1 if stats["errors"] else 0)
@@ -1,14 +1,33 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import base64
+import hashlib
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from google.cloud import bigquery
 import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
 
 from python_backend.config import logger, GCP_PROJECT_ID, BQ_MIT_DATASET, BQ_MIT_TABLE
-from python_backend.storage.bigquery import get_bigquery_client
+from python_backend.config import PROJECTS_CACHE_TTL, PROJECTS_CACHE_STALE_TTL, API_MAX_CONCURRENT_FETCHES
+from python_backend.config import PROJECTS_CACHE_MAX_ENTRIES, PROJECTS_PAGE_MAX_LIMIT, PROJECTS_FETCH_COLUMNAR
+from python_backend.config import PROJECTS_SNAPSHOT_ENABLED, EXPORT_PAGE_SIZE
+from python_backend.api.export import write_ndjson, write_csv, write_parquet
+from python_backend.storage.bigquery import get_bigquery_client, get_dashboard_aggregates, latest_analyses_query
+from python_backend.storage.snapshot import project_snapshot
+from python_backend.utils.ttl_cache import TTLCache
 
-app = FastAPI(title="UNOPS Remote Sensing API")
+try:
+    # Optional: brotli for clients that accept it, gzip otherwise
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+app = FastAPI(title="UNOPS Remote Sensing API", default_response_class=ORJSONResponse)
 
 # Add CORS middleware to allow frontend to call this API
 app.add_middleware(
@@ -17,60 +36,445 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Compress responses larger than 1 KB for clients that accept it
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 client = get_bigquery_client()
 
-def fetch_projects_from_bigquery() -> List[Dict[str, Any]]:
+projects_cache = TTLCache(ttl=PROJECTS_CACHE_TTL, stale_ttl=PROJECTS_CACHE_STALE_TTL,
+                          max_entries=PROJECTS_CACHE_MAX_ENTRIES)
+
+# Bounds how many worker threads endpoints may tie up with BigQuery fetches
+fetch_semaphore = asyncio.Semaphore(API_MAX_CONCURRENT_FETCHES)
+
+async def run_blocking(func, *args, **kwargs):
     """
-    Fetch project data from BigQuery and format for frontend.
+    Run a blocking call (BigQuery client, row transforms) in the threadpool.
+    
+    Keeps the event loop free to serve other requests while the call runs,
+    with at most API_MAX_CONCURRENT_FETCHES such calls in flight.
+    """
+    async with fetch_semaphore:
+        return await run_in_threadpool(func, *args, **kwargs)
+
+def encode_json(content: Any) -> Tuple[bytes, str]:
+    """
+    Serialize a response body with orjson and compute its ETag.
     
     Returns:
-        List of project dictionaries formatted for the frontend
+        Tuple of (JSON bytes, weak ETag). The ETag is weak because the
+        compression middleware may change the encoding of the same content.
+    """
+    body = orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return body, f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+async def json_response(request: Request, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build a JSON response directly, skipping response_model validation.
+    
+    Returns 304 Not Modified without a body when the client already holds
+    this exact content (If-None-Match).
+    """
+    body, etag = await run_in_threadpool(encode_json, content)
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Frontend field -> columns of final_results_engagement it is built from
+FIELD_COLUMNS = {
+    "id": ["file_id"],
+    "name": ["Engagement_Description"],
+    "legal_agreement": ["Legal_Agreement"],
+    "file_url": ["File_URL"],
+    "region": ["Region"],
+    "hub": ["Hub"],
+    "donor": ["Donor_Description"],
+    "projectManager": ["Project_Manager_Name"],
+    "projectManagerEmail": ["Project_Manager_Email_Address"],
+    "deputyProjectManager": ["Deputy_Project_Manager_Name"],
+    "deputyProjectManagerEmail": ["Deputy_Project_Manager_Email_Address"],
+    "summary": ["project_summary"],
+    "objectives": ["objectives"],
+    "problems_addressed": ["problems_addressed"],
+    "beneficiaries": ["beneficiaries_and_impacted_groups"],
+    "anticipated_outcomes": ["anticipated_outcomes_short_and_long_term"],
+    "sdg_goals": ["sdg_goals"],
+    "sdg_indicators": ["sdg_indicators"],
+    "relevantTools": ["remote_sensing_tools"],
+    "quantifiable_outcomes": ["quantifiable_outcome_list"],
+    "quantifiable_outcome_list": ["quantifiable_outcome_list"],
+    "remote_sensing_tools": ["remote_sensing_tools"],
+}
+
+# Repeated RECORD columns, returned by BigQuery as lists of Row objects
+REPEATED_COLUMNS = [
+    "quantifiable_outcome_list",
+    "sdg_goals",
+    "sdg_indicators",
+    "remote_sensing_tools"
+]
+
+# Filter name -> predicate on final_results_engagement; each takes an ARRAY<STRING>
+# parameter of the same name and matches rows with any of the given values
+FILTER_PREDICATES = {
+    "region": "Region IN UNNEST(@region)",
+    "hub": "Hub IN UNNEST(@hub)",
+    "donor": "Donor_Description IN UNNEST(@donor)",
+    "sdg_goal": "EXISTS (SELECT 1 FROM UNNEST(sdg_goals) AS goal WHERE goal.sdg_goal IN UNNEST(@sdg_goal))",
+    "sdg_indicator": "EXISTS (SELECT 1 FROM UNNEST(sdg_indicators) AS indicator "
+                     "WHERE indicator.sdg_indicator IN UNNEST(@sdg_indicator))",
+    "tool": "EXISTS (SELECT 1 FROM UNNEST(remote_sensing_tools) AS tool WHERE tool.technology IN UNNEST(@tool))",
+}
+
+# Filter name -> (column, field of its repeated RECORD or None), for filtering the snapshot
+FILTER_FIELDS = {
+    "region": ("Region", None),
+    "hub": ("Hub", None),
+    "donor": ("Donor_Description", None),
+    "sdg_goal": ("sdg_goals", "sdg_goal"),
+    "sdg_indicator": ("sdg_indicators", "sdg_indicator"),
+    "tool": ("remote_sensing_tools", "technology"),
+}
+
+ProjectFilters = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+def get_projects_table_id() -> str:
+    return f"{GCP_PROJECT_ID}.{BQ_MIT_DATASET}.final_results_engagement"
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a `fields=` query parameter into a tuple of frontend field names.
+    
+    Args:
+        fields: Comma-separated field names, or None for every field
+        
+    Returns:
+        Tuple of field names in FIELD_COLUMNS order (always including "id"), or None
+        
+    Raises:
+        ValueError: If a field name is unknown
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(FIELD_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in FIELD_COLUMNS if name in requested)
+
+def normalize_filters(filters: Dict[str, Optional[List[str]]]) -> Optional[ProjectFilters]:
+    """
+    Turn filter query parameters into a hashable, order-independent form.
+    
+    Args:
+        filters: Filter name (see FILTER_PREDICATES) -> accepted values, or None if unset
+        
+    Returns:
+        Sorted tuple of (name, sorted values) for the filters that are set, or None
+    """
+    normalized = tuple(
+        (name, tuple(sorted(set(values))))
+        for name, values in sorted(filters.items())
+        if values
+    )
+    return normalized or None
+
+def encode_cursor(file_id: str) -> str:
+    """Opaque pagination cursor pointing after a project."""
+    return base64.urlsafe_b64encode(json.dumps({"after": file_id}).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode a pagination cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
     try:
-        if not client:
-            logger.error("BigQuery client not initialized")
-            return []
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["after"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def projects_columns(fields: Optional[Tuple[str, ...]] = None) -> List[str]:
+    """final_results_engagement columns the frontend fields (None for all) are built from."""
+    columns = []
+    for name in fields or FIELD_COLUMNS:
+        for column in FIELD_COLUMNS[name]:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+def build_projects_query(fields: Optional[Tuple[str, ...]] = None,
+                         after: Optional[str] = None,
+                         limit: Optional[int] = None,
+                         project_id: Optional[str] = None,
+                         filters: Optional[ProjectFilters] = None) -> Tuple[str, List[Any]]:
+    """
+    Build the SELECT for final_results_engagement.
+    
+    A document analyzed more than once has one row per analysis, so rows
+    are first reduced to the latest analysis of each file_id (see
+    latest_analyses_query). file_id is then unique, which keyset
+    pagination on it and the project detail lookup rely on.
+    
+    Args:
+        fields: Frontend fields to fetch (None for all), mapped to an explicit column list
+        after: Only return projects whose file_id sorts after this one
+        limit: Maximum number of rows
+        project_id: Only return this project
+        filters: Filters from normalize_filters, combined with AND
+        
+    Returns:
+        Tuple of (SQL, BigQuery query parameters)
+    """
+    columns = projects_columns(fields)
+    
+    # Conditions on file_id alone are applied before the dedupe, the filters after it
+    id_conditions = []
+    conditions = []
+    params = []
+    if project_id is not None:
+        id_conditions.append("results.file_id = @project_id")
+        params.append(bigquery.ScalarQueryParameter("project_id", "STRING", project_id))
+    if after is not None:
+        id_conditions.append("results.file_id > @after")
+        params.append(bigquery.ScalarQueryParameter("after", "STRING", after))
+    for name, values in filters or ():
+        conditions.append(FILTER_PREDICATES[name])
+        params.append(bigquery.ArrayQueryParameter(name, "STRING", list(values)))
+    
+    query = (f"SELECT {', '.join(f'`{column}`' for column in columns)} "
+             f"FROM ({latest_analyses_query(get_projects_table_id(), ' AND '.join(id_conditions) or 'TRUE')})")
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY file_id"
+    if limit is not None:
+        query += " LIMIT @limit"
+        params.append(bigquery.ScalarQueryParameter("limit", "INT64", limit))
+    return query, params
+
+def query_projects_from_bigquery(fields: Optional[Tuple[str, ...]] = None,
+                                 after: Optional[str] = None,
+                                 limit: Optional[int] = None,
+                                 project_id: Optional[str] = None,
+                                 filters: Optional[ProjectFilters] = None) -> List[Dict[str, Any]]:
+    """
+    Query project data from BigQuery and format for frontend.
+    
+    Args:
+        See build_projects_query.
+    
+    Returns:
+        List of project dictionaries formatted for the frontend
         
-        table_id = f"{GCP_PROJECT_ID}.{BQ_MIT_DATASET}.final_results_engagement"
-        query = f"SELECT * FROM `{table_id}`"
+    Raises:
+        RuntimeError: If the BigQuery client is not initialized; query errors are raised as is
+    """
+    if not client:
+        raise RuntimeError("BigQuery client not initialized")
+    
+    query, params = build_projects_query(fields, after, limit, project_id, filters)
+    job_config = bigquery.QueryJobConfig(query_parameters=params)
+    query_job = client.query(query, job_config=job_config)
+    
+    if PROJECTS_FETCH_COLUMNAR:
+        # Large results are read through the BigQuery Storage Read API
+        table = query_job.to_arrow(create_bqstorage_client=True)
+        projects = arrow_to_projects(table, fields)
+    else:
+        projects = rows_to_projects(query_job.result(), fields)
+    
+    logger.info(f"Retrieved {len(projects)} projects from BigQuery")
+    return projects
+
+def rows_to_projects(rows, fields: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
+    """
+    Format BigQuery result rows for the frontend, one row at a time.
+    
+    Args:
+        rows: Iterable of bigquery.Row
+        fields: Only keep these frontend fields (None for all)
+    
+    Returns:
+        List of project dictionaries formatted for the frontend
+    """
+    projects = []
+    for row in rows:
+        # Convert row to dict
+        project = dict(row.items())
         
-        query_job = client.query(query)
-        results = query_job.result()
+        # Handle nested/repeated fields
+        for key in REPEATED_COLUMNS:
+            if key in project and project[key] is not None:
+                project[key] = [dict(item) for item in project[key]]
         
-        projects = []
-        for row in results:
-            # Convert row to dict
-            project = dict(row.items())
-            
-            # Handle nested/repeated fields
-            for key in [
-                "quantifiable_outcome_list",
-                "sdg_goals",
-                "sdg_indicators",
-                "remote_sensing_tools"
-            ]:
-                if key in project and project[key] is not None:
-                    project[key] = [dict(item) for item in project[key]]
-            
-            # Transform to match frontend expectations
-            transformed_project = transform_project_for_frontend(project)
-            projects.append(transformed_project)
+        # Transform to match frontend expectations
+        transformed_project = transform_project_for_frontend(project, fields)
+        projects.append(transformed_project)
+    return projects
+
+def filter_projects_table(table,
+                          after: Optional[str] = None,
+                          limit: Optional[int] = None,
+                          project_id: Optional[str] = None,
+                          filters: Optional[ProjectFilters] = None):
+    """
+    Arrow equivalent of the WHERE / LIMIT of build_projects_query.
+    
+    Args:
+        table: pyarrow.Table sorted by file_id, one row per file_id
+        Other arguments: see build_projects_query
+    
+    Returns:
+        The matching rows as a pyarrow.Table
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    
+    masks = []
+    if project_id is not None:
+        masks.append(pc.equal(table.column("file_id"), project_id))
+    if after is not None:
+        masks.append(pc.greater(table.column("file_id"), after))
+    for name, values in filters or ():
+        column, item_field = FILTER_FIELDS[name]
+        value_set = pa.array(values, pa.string())
+        if item_field is None:
+            masks.append(pc.is_in(table.column(column), value_set=value_set))
+            continue
+        # Rows with at least one repeated item matching, like EXISTS (... UNNEST ...)
+        items = table.column(column).combine_chunks()
+        item_matches = pc.is_in(items.flatten().field(item_field), value_set=value_set)
+        matching_rows = pc.filter(pc.list_parent_indices(items), item_matches)
+        masks.append(pc.is_in(pa.array(range(table.num_rows), pa.int64()), value_set=matching_rows))
+    
+    if masks:
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = pc.and_(mask, other)
+        table = table.filter(mask)
+    if limit is not None:
+        table = table.slice(0, limit)
+    return table
+
+def query_projects_from_snapshot(fields: Optional[Tuple[str, ...]] = None,
+                                 after: Optional[str] = None,
+                                 limit: Optional[int] = None,
+                                 project_id: Optional[str] = None,
+                                 filters: Optional[ProjectFilters] = None) -> List[Dict[str, Any]]:
+    """
+    Same as query_projects_from_bigquery, served from the local project snapshot.
+    
+    Raises:
+        Exception: If there is no snapshot yet and BigQuery cannot be read
+    """
+    table = filter_projects_table(project_snapshot.get_table(), after, limit, project_id, filters)
+    return arrow_to_projects(table, fields)
+
+def query_projects(*args, **kwargs) -> List[Dict[str, Any]]:
+    """Query projects from the snapshot if PROJECTS_SNAPSHOT_ENABLED, from BigQuery otherwise."""
+    if PROJECTS_SNAPSHOT_ENABLED:
+        return query_projects_from_snapshot(*args, **kwargs)
+    return query_projects_from_bigquery(*args, **kwargs)
+
+def fetch_projects_page(fields: Optional[Tuple[str, ...]] = None,
+                        cursor: Optional[str] = None,
+                        limit: Optional[int] = None,
+                        filters: Optional[ProjectFilters] = None,
+                        use_cache: bool = True) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of projects, ordered by id, optionally filtered.
+    
+    Pages are cached in-process for PROJECTS_CACHE_TTL seconds, then
+    served stale for up to PROJECTS_CACHE_STALE_TTL seconds while a
+    background query refreshes them. Concurrent cache misses share one query.
+    
+    Args:
+        fields: Frontend fields to return (see parse_fields), None for all
+        cursor: Cursor returned with the previous page, None for the first page
+        limit: Page size, None for every remaining project
+        filters: Filters from normalize_filters, None for all projects
+        use_cache: Set to False to always query BigQuery.
+    
+    Returns:
+        Tuple of (projects, cursor of the next page or None on the last page)
         
-        logger.info(f"Retrieved {len(projects)} projects from BigQuery")
-        return projects
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = decode_cursor(cursor) if cursor else None
+    
+    def load():
+        # One extra row tells whether there is a next page
+        projects = query_projects(fields, after, limit + 1 if limit else None, filters=filters)
+        if limit and len(projects) > limit:
+            projects = projects[:limit]
+            return projects, encode_cursor(projects[-1]["id"])
+        return projects, None
+    
+    try:
+        if not use_cache:
+            return load()
+        return projects_cache.get(("projects", fields, after, limit, filters), load)
     
     except Exception as e:
         logger.error(f"Error fetching projects from BigQuery: {str(e)}")
-        return []
+        return [], None
 
-def transform_project_for_frontend(project: Dict[str, Any]) -> Dict[str, Any]:
+def fetch_projects_from_bigquery(use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Fetch project data from BigQuery and format for frontend.
+    
+    Args:
+        use_cache: Set to False to always query BigQuery.
+    
+    Returns:
+        List of project dictionaries formatted for the frontend
+    """
+    projects, _ = fetch_projects_page(use_cache=use_cache)
+    return projects
+
+def fetch_project_by_id(project_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one project with every field.
+    
+    Args:
+        project_id: Project id (file_id)
+        use_cache: Set to False to always query BigQuery.
+    
+    Returns:
+        The project formatted for the frontend, or None if it does not exist
+    """
+    def load():
+        projects = query_projects(project_id=project_id, limit=1)
+        return projects[0] if projects else None
+    
+    if not use_cache:
+        return load()
+    return projects_cache.get(("project", project_id), load)
+
+def transform_project_for_frontend(project: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
     """
     Transform a BigQuery project row to match the frontend expected format.
     
     Args:
         project: Raw project data from BigQuery
+        fields: Only keep these frontend fields (None for all)
         
     Returns:
         Transformed project data ready for frontend
@@ -127,20 +531,396 @@ def transform_project_for_frontend(project: Dict[str, Any]) -> Dict[str, Any]:
         "remote_sensing_tools": project.get("remote_sensing_tools", [])
     }
     
+    if fields is not None:
+        transformed = {name: transformed[name] for name in fields}
     return transformed
 
+# Frontend fields copied from one column: field -> (column, default if the column was not selected)
+COPIED_FIELDS = {
+    "id": ("file_id", ""),
+    "name": ("Engagement_Description", ""),
+    "legal_agreement": ("Legal_Agreement", ""),
+    "file_url": ("File_URL", ""),
+    "region": ("Region", "Unknown"),
+    "hub": ("Hub", ""),
+    "donor": ("Donor_Description", ""),
+    "projectManager": ("Project_Manager_Name", "Unknown"),
+    "projectManagerEmail": ("Project_Manager_Email_Address", "unknown@example.com"),
+    "deputyProjectManager": ("Deputy_Project_Manager_Name", ""),
+    "deputyProjectManagerEmail": ("Deputy_Project_Manager_Email_Address", ""),
+    "summary": ("project_summary", ""),
+    "objectives": ("objectives", ""),
+    "problems_addressed": ("problems_addressed", ""),
+    "beneficiaries": ("beneficiaries_and_impacted_groups", ""),
+    "anticipated_outcomes": ("anticipated_outcomes_short_and_long_term", ""),
+    "sdg_goals": ("sdg_goals", []),
+    "sdg_indicators": ("sdg_indicators", []),
+    "quantifiable_outcome_list": ("quantifiable_outcome_list", []),
+    "remote_sensing_tools": ("remote_sensing_tools", []),
+}
+
+def arrow_to_projects(table, fields: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
+    """
+    Columnar equivalent of rows_to_projects for a pyarrow.Table.
+    
+    Each source column is converted to Python objects once (repeated
+    RECORDs come out as lists of dicts directly), derived fields are
+    computed column by column, and rows are only assembled at the end.
+    
+    Args:
+        table: pyarrow.Table with (a subset of) the final_results_engagement columns
+        fields: Only keep these frontend fields (None for all)
+    
+    Returns:
+        List of project dictionaries formatted for the frontend
+    """
+    fields = fields or tuple(FIELD_COLUMNS)
+    num_rows = table.num_rows
+    converted = {}
+    
+    def column(name, default):
+        if name not in converted:
+            converted[name] = table.column(name).to_pylist() if name in table.column_names else None
+        if converted[name] is not None:
+            return converted[name]
+        if isinstance(default, list):
+            return [[] for _ in range(num_rows)]
+        return [default] * num_rows
+    
+    columns = []
+    for name in fields:
+        if name == "relevantTools":
+            columns.append([
+                [
+                    {
+                        "name": tool.get("technology", ""),
+                        "rationale": tool.get("relevance_justification", ""),
+                        "project_description_context": tool.get("project_description_context", "")
+                    }
+                    for tool in tools or [] if tool.get("technology")
+                ]
+                for tools in column("remote_sensing_tools", [])
+            ])
+        elif name == "quantifiable_outcomes":
+            columns.append([
+                [item.get("outcome_item", "") for item in items or [] if item.get("outcome_item")]
+                for items in column("quantifiable_outcome_list", [])
+            ])
+        else:
+            columns.append(column(*COPIED_FIELDS[name]))
+    
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+def project_filters(
+    region: Optional[List[str]] = Query(None),
+    hub: Optional[List[str]] = Query(None),
+    donor: Optional[List[str]] = Query(None),
+    sdg_goal: Optional[List[str]] = Query(None, description="SDG goal number, e.g. 16"),
+    sdg_indicator: Optional[List[str]] = Query(None, description="SDG indicator, e.g. 16.4.1"),
+    tool: Optional[List[str]] = Query(None, description="Remote sensing technology"),
+) -> Optional[ProjectFilters]:
+    """Filter query parameters shared by the list and export endpoints."""
+    return normalize_filters({
+        "region": region, "hub": hub, "donor": donor,
+        "sdg_goal": sdg_goal, "sdg_indicator": sdg_indicator, "tool": tool,
+    })
+
 @app.get("/api/projects", response_model=List[Dict[str, Any]])
-async def get_projects():
+async def get_projects(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,region"),
+    limit: Optional[int] = Query(None, ge=1, le=PROJECTS_PAGE_MAX_LIMIT, description="Page size; all projects if omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value of the previous page"),
+    filters: Optional[ProjectFilters] = Depends(project_filters),
+):
     """
-    Get all projects from BigQuery.
+    Get projects from BigQuery, optionally filtered, paginated and projected.
+    
+    The body is always a list of projects. When more pages remain, the
+    cursor of the next page is returned in the X-Next-Cursor header.
+    Filters can be repeated (?region=A&region=B) to match any of the values;
+    different filters are combined with AND.
     
     Returns:
         List of projects formatted for the frontend
     """
-    projects = fetch_projects_from_bigquery()
+    try:
+        parsed_fields = parse_fields(fields)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    projects, next_cursor = await run_blocking(fetch_projects_page, parsed_fields, cursor, limit, filters)
     if not projects:
         logger.warning("No projects found or error occurred")
-    return projects
+    return await json_response(request, projects, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+# Aggregate dimension -> key in the /api/aggregates response
+AGGREGATE_KEYS = {
+    "sdg_goal": "sdg_goals",
+    "region": "regions",
+    "hub": "hubs",
+    "donor": "donors",
+    "tool": "tools",
+}
+
+def aggregates_from_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Shape materialized (dimension, value, project_count) rows for the frontend."""
+    aggregates = {key: {} for key in AGGREGATE_KEYS.values()}
+    aggregates.update({"total_projects": 0, "computed_at": None, "source": "materialized"})
+    for row in rows:
+        if row["dimension"] == "total":
+            aggregates["total_projects"] = row["project_count"]
+        elif row["dimension"] in AGGREGATE_KEYS:
+            aggregates[AGGREGATE_KEYS[row["dimension"]]][row["value"]] = row["project_count"]
+        if row.get("computed_at") is not None:
+            aggregates["computed_at"] = row["computed_at"].isoformat()
+    return aggregates
+
+def aggregates_from_projects(projects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the same counts from the cached project list."""
+    aggregates = {key: {} for key in AGGREGATE_KEYS.values()}
+    
+    def count(key, values):
+        for value in {value for value in values if value}:
+            aggregates[key][value] = aggregates[key].get(value, 0) + 1
+    
+    for project in projects:
+        count("sdg_goals", [goal.get("sdg_goal") for goal in project.get("sdg_goals") or []])
+        count("regions", [project.get("region")])
+        count("hubs", [project.get("hub")])
+        count("donors", [project.get("donor")])
+        count("tools", [tool.get("technology") for tool in project.get("remote_sensing_tools") or []])
+    
+    aggregates.update({
+        "total_projects": len(projects),
+        "computed_at": datetime.utcnow().isoformat(),
+        "source": "projects",
+    })
+    return aggregates
+
+def fetch_aggregates(use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Fetch the dashboard counts per SDG goal, region, hub, donor and tool.
+    
+    Reads the materialized aggregates table, falling back to counting the
+    cached project list if it is missing or empty. Cached like the projects.
+    
+    Returns:
+        Dict with total_projects, one {value: project count} dict per dimension,
+        computed_at and source ("materialized" or "projects")
+    """
+    def load():
+        try:
+            rows = get_dashboard_aggregates()
+            if rows:
+                return aggregates_from_rows(rows)
+            logger.warning("Dashboard aggregates table is empty, computing from projects")
+        except Exception as e:
+            logger.warning(f"Could not read dashboard aggregates, computing from projects: {str(e)}")
+        return aggregates_from_projects(fetch_projects_from_bigquery(use_cache=use_cache))
+    
+    if not use_cache:
+        return load()
+    return projects_cache.get(("aggregates",), load)
+
+@app.get("/api/aggregates", response_model=Dict[str, Any])
+async def get_aggregates(request: Request):
+    """
+    Get precomputed dashboard counts.
+    
+    Returns:
+        Project counts per SDG goal, region, hub, donor and remote sensing tool
+    """
+    return await json_response(request, await run_blocking(fetch_aggregates))
+
+# Export format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def query_project_pages(fields: Optional[Tuple[str, ...]] = None,
+                        filters: Optional[ProjectFilters] = None,
+                        page_size: int = EXPORT_PAGE_SIZE):
+    """
+    Run the projects query and return its results as an iterator of pages.
+    
+    Served from the project snapshot, filtered like /api/projects, if
+    PROJECTS_SNAPSHOT_ENABLED; from BigQuery otherwise.
+    
+    Returns:
+        Iterator of pyarrow.RecordBatch, one per page
+        
+    Raises:
+        RuntimeError: If the BigQuery client is not initialized; query errors are raised as is
+    """
+    if PROJECTS_SNAPSHOT_ENABLED:
+        table = filter_projects_table(project_snapshot.get_table(), filters=filters)
+        table = table.select([column for column in projects_columns(fields) if column in table.column_names])
+        return iter(table.to_batches(max_chunksize=page_size))
+    
+    if not client:
+        raise RuntimeError("BigQuery client not initialized")
+    
+    query, params = build_projects_query(fields, filters=filters)
+    job_config = bigquery.QueryJobConfig(query_parameters=params)
+    rows = client.query(query, job_config=job_config).result(page_size=page_size)
+    return rows.to_arrow_iterable()
+
+def export_projects(record_batches, export_format: str, fields: Optional[Tuple[str, ...]] = None):
+    """
+    Encode pages of projects in an export format, one page at a time.
+    
+    NDJSON and CSV hold the frontend fields; Parquet holds the selected
+    final_results_engagement columns as stored.
+    
+    Returns:
+        Iterator of encoded chunks
+    """
+    if export_format == "parquet":
+        return write_parquet(record_batches)
+    
+    import pyarrow as pa
+    project_batches = (arrow_to_projects(pa.Table.from_batches([batch]), fields) for batch in record_batches)
+    if export_format == "csv":
+        return write_csv(project_batches, fields or tuple(FIELD_COLUMNS))
+    return write_ndjson(project_batches)
+
+@app.get("/api/projects/export")
+async def export_projects_endpoint(
+    format: str = Query("ndjson", description="ndjson, csv or parquet"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    filters: Optional[ProjectFilters] = Depends(project_filters),
+):
+    """
+    Stream every matching project as NDJSON, CSV or Parquet.
+    
+    Pages through the results (of the snapshot or BigQuery, like
+    /api/projects) and writes each page to the response as it arrives, so
+    memory stays bounded whatever the number of projects. Takes the same
+    filters as /api/projects. Counts against API_MAX_CONCURRENT_FETCHES
+    until the stream ends.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    try:
+        parsed_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The export holds a fetch slot until the last page is sent, not only while the query starts
+    await fetch_semaphore.acquire()
+    try:
+        # Run the query before streaming so that failures still get an error status
+        record_batches = await run_in_threadpool(query_project_pages, parsed_fields, filters)
+    except Exception as e:
+        fetch_semaphore.release()
+        logger.error(f"Error exporting projects: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error exporting projects")
+    
+    async def stream():
+        try:
+            async for chunk in iterate_in_threadpool(export_projects(record_batches, format, parsed_fields)):
+                yield chunk
+        finally:
+            fetch_semaphore.release()
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="projects.{extension}"'},
+    )
+
+def parse_watermark(value: str) -> datetime:
+    """
+    Parse a `since=` watermark (ISO 8601; UTC if no offset is given).
+    
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    try:
+        watermark = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid watermark: {value}")
+    if watermark.tzinfo is None:
+        watermark = watermark.replace(tzinfo=timezone.utc)
+    return watermark
+
+def fetch_project_changes(since: datetime, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """
+    Fetch the projects whose document was processed after a watermark.
+    
+    Served from the project snapshot, so the cost is proportional to the
+    number of changed projects. Deleted projects are not reported.
+    
+    Projects processed up to PROJECTS_SNAPSHOT_OVERLAP seconds before
+    `since` are included again, so rows that became visible late are not
+    missed; callers dedupe by "id", keeping the last copy.
+    
+    Args:
+        since: Watermark from a previous call
+        fields: Frontend fields to return (see parse_fields), None for all
+    
+    Returns:
+        Dict with the changed projects and the watermark to pass next time
+    """
+    table, watermark = project_snapshot.get_changes(since)
+    projects = arrow_to_projects(table, fields)
+    # Nothing newer than `since` yet: keep the client's watermark
+    watermark = max(watermark, since) if watermark else since
+    return {"projects": projects, "count": len(projects), "watermark": watermark.isoformat()}
+
+@app.get("/api/projects/changes", response_model=Dict[str, Any])
+async def get_project_changes(
+    request: Request,
+    since: str = Query(..., description="Watermark returned by the previous call (ISO 8601 timestamp)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+):
+    """
+    Get projects inserted or updated after a watermark.
+    
+    Poll with the returned watermark to receive newly analyzed projects.
+    Projects processed shortly before the watermark are sent again (rows
+    can become visible late), so merge the results by "id".
+    
+    Returns:
+        {"projects": [...], "count": n, "watermark": "<timestamp>"}
+    """
+    try:
+        watermark = parse_watermark(since)
+        parsed_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        changes = await run_blocking(fetch_project_changes, watermark, parsed_fields)
+    except Exception as e:
+        logger.error(f"Error fetching project changes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching project changes")
+    return await json_response(request, changes)
+
+@app.get("/api/projects/{project_id:path}", response_model=Dict[str, Any])
+async def get_project(request: Request, project_id: str):
+    """
+    Get one project with every field.
+    
+    The id is the project's file_id (its document link), URL-encoded.
+    
+    Returns:
+        The project formatted for the frontend
+    """
+    try:
+        project = await run_blocking(fetch_project_by_id, project_id)
+    except Exception as e:
+        logger.error(f"Error fetching project {project_id} from BigQuery: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching project")
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return await json_response(request, project)
 
 if __name__ == "__main__":
     import uvicorn
@@ -25,6 +25,141 @@ BQ_FA_TABLE = os.getenv("BQ_FA_TABLE")
 
 BQ_MIT_DATASET = os.getenv("BQ_MIT_DATASET")
 BQ_MIT_TABLE = os.getenv("BQ_MIT_TABLE")
+# Materialized dashboard counts, rebuilt by storage.bigquery.refresh_dashboard_aggregates
+BQ_AGGREGATES_TABLE = os.getenv("BQ_AGGREGATES_TABLE", "dashboard_aggregates")
+# Work leases of batch runners sharing a link set (BATCH_LEASE_BACKEND=bigquery)
+BQ_LEASES_TABLE = os.getenv("BQ_LEASES_TABLE", "document_leases")
+
+# Document fetching: how many downloads run ahead of parsing, and the
+# maximum number of concurrent downloads per storage backend
+DOWNLOAD_PREFETCH = int(os.getenv("DOWNLOAD_PREFETCH", "4"))
+DOWNLOAD_CONCURRENCY = {
+    "drive": int(os.getenv("DOWNLOAD_CONCURRENCY_DRIVE", "2")),
+    "gcs": int(os.getenv("DOWNLOAD_CONCURRENCY_GCS", "8")),
+    "http": int(os.getenv("DOWNLOAD_CONCURRENCY_HTTP", "4")),
+}
+
+# Local caches (downloads, parsed text, ...) live under this directory
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.expanduser("~/.cache/sdg-insight-engine"))
+
+# Download cache: re-runs reuse documents whose Drive checksum, GCS generation
+# or HTTP ETag has not changed
+DOWNLOAD_CACHE_ENABLED = os.getenv("DOWNLOAD_CACHE_ENABLED", "true").lower() == "true"
+DOWNLOAD_CACHE_DIR = os.getenv("DOWNLOAD_CACHE_DIR", os.path.join(CACHE_DIR, "downloads"))
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(5 * 1024 ** 3)))
+
+# Docling parsing: number of worker processes (1 parses in-process) and how
+# many documents a worker parses before it is replaced, to bound memory
+DOCLING_WORKERS = int(os.getenv("DOCLING_WORKERS", "1"))
+DOCLING_MAX_TASKS_PER_WORKER = int(os.getenv("DOCLING_MAX_TASKS_PER_WORKER", "25"))
+
+# Parsed-text cache: Docling output keyed by file content hash and parser version
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true"
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", os.path.join(CACHE_DIR, "parsed_text.sqlite"))
+
+# Policy corpus: file names under POLICY_FOLDER in the order the prompts use
+# them (two SDG indicator documents, then three remote-sensing documents)
+POLICY_DOC_FILES = [name.strip() for name in os.getenv("POLICY_DOC_FILES", "").split(",") if name.strip()]
+POLICY_CORPUS_PATH = os.getenv("POLICY_CORPUS_PATH", os.path.join(CACHE_DIR, "policy_corpus.json.gz"))
+# Seconds between checks of the policy folder for changed files
+POLICY_CHECK_INTERVAL = float(os.getenv("POLICY_CHECK_INTERVAL", "300"))
+
+# Analysis mode: "multi" (summary, SDG and remote sensing calls in parallel)
+# or "single" (one call with a JSON response schema)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "multi")
+
+# Analysis LLM calls: per-stage timeouts in seconds
+ANALYSIS_DEFAULT_TIMEOUT = float(os.getenv("ANALYSIS_DEFAULT_TIMEOUT", "180"))
+ANALYSIS_STAGE_TIMEOUTS = {
+    "summary": float(os.getenv("ANALYSIS_TIMEOUT_SUMMARY", str(ANALYSIS_DEFAULT_TIMEOUT))),
+    "sdg": float(os.getenv("ANALYSIS_TIMEOUT_SDG", str(ANALYSIS_DEFAULT_TIMEOUT))),
+    "remote_sensing": float(os.getenv("ANALYSIS_TIMEOUT_REMOTE_SENSING", str(ANALYSIS_DEFAULT_TIMEOUT))),
+    "structured": float(os.getenv("ANALYSIS_TIMEOUT_STRUCTURED", str(ANALYSIS_DEFAULT_TIMEOUT))),
+}
+
+# Policy context for the SDG and remote sensing prompts: "full" pastes every
+# policy document, "retrieval" passes only the top-k passages relevant to the
+# project summary, within a token budget per prompt
+POLICY_CONTEXT_MODE = os.getenv("POLICY_CONTEXT_MODE", "full")
+POLICY_CONTEXT_TOP_K = int(os.getenv("POLICY_CONTEXT_TOP_K", "20"))
+POLICY_CONTEXT_TOKEN_BUDGET = int(os.getenv("POLICY_CONTEXT_TOKEN_BUDGET", "8000"))
+POLICY_INDEX_DIR = os.getenv("POLICY_INDEX_DIR", os.path.join(CACHE_DIR, "policy_index"))
+# Chunking of the policy documents in every policy vector index
+POLICY_INDEX_CHUNK_SIZE = int(os.getenv("POLICY_INDEX_CHUNK_SIZE", "180"))
+POLICY_INDEX_CHUNK_OVERLAP = int(os.getenv("POLICY_INDEX_CHUNK_OVERLAP", "10"))
+
+# LLM response cache keyed by model, generation config and prompt hash.
+# LLM_CACHE_BYPASS=true always calls the model (responses are still stored).
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_responses.sqlite"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+# Embedding cache keyed by model name and chunk text hash
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(CACHE_DIR, "embeddings.sqlite"))
+
+# Analysis results are written to BigQuery in batches of up to this many rows,
+# or after this many seconds, whichever comes first
+RESULT_WRITER_MAX_ROWS = int(os.getenv("RESULT_WRITER_MAX_ROWS", "200"))
+RESULT_WRITER_FLUSH_INTERVAL = float(os.getenv("RESULT_WRITER_FLUSH_INTERVAL", "60"))
+# A load that fails on BigQuery's side (outage, quota, no client) is retried
+# with exponential backoff up to RESULT_WRITER_MAX_BACKOFF seconds; once
+# RESULT_WRITER_MAX_BUFFERED_ROWS rows are waiting, adding rows blocks until
+# the next attempt. A load rejected for its rows is split into single-row
+# loads, at most RESULT_WRITER_MAX_SINGLE_ROW_LOADS per flush, and rows that
+# still fail go to the dead-letter file.
+RESULT_WRITER_MAX_BACKOFF = float(os.getenv("RESULT_WRITER_MAX_BACKOFF", "900"))
+RESULT_WRITER_MAX_BUFFERED_ROWS = int(os.getenv("RESULT_WRITER_MAX_BUFFERED_ROWS", "2000"))
+RESULT_WRITER_MAX_SINGLE_ROW_LOADS = int(os.getenv("RESULT_WRITER_MAX_SINGLE_ROW_LOADS", "20"))
+RESULT_WRITER_DEAD_LETTER_PATH = os.getenv("RESULT_WRITER_DEAD_LETTER_PATH",
+                                           os.path.join(CACHE_DIR, "result_dead_letter.jsonl"))
+
+# Batch runner: worker threads per stage and the size of the queue in front
+# of each stage (documents waiting between stages)
+BATCH_DOWNLOAD_WORKERS = int(os.getenv("BATCH_DOWNLOAD_WORKERS", "4"))
+BATCH_PARSE_WORKERS = int(os.getenv("BATCH_PARSE_WORKERS", str(DOCLING_WORKERS)))
+BATCH_ANALYSIS_WORKERS = int(os.getenv("BATCH_ANALYSIS_WORKERS", "4"))
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "8"))
+# Checkpoint journal of the batch runner: a restarted batch resumes each
+# document from its last completed stage
+BATCH_JOURNAL_ENABLED = os.getenv("BATCH_JOURNAL_ENABLED", "true").lower() == "true"
+BATCH_JOURNAL_DIR = os.getenv("BATCH_JOURNAL_DIR", os.path.join(CACHE_DIR, "batch_journal"))
+# Work leases so several batch runners split one link set: "none", "sqlite"
+# (a file shared by the runners, e.g. on one host or in tests) or "bigquery".
+# Unrenewed leases expire after BATCH_LEASE_TTL seconds and the document can
+# be claimed again, up to BATCH_LEASE_MAX_ATTEMPTS times per batch.
+BATCH_LEASE_BACKEND = os.getenv("BATCH_LEASE_BACKEND", "none")
+BATCH_LEASE_PATH = os.getenv("BATCH_LEASE_PATH", os.path.join(CACHE_DIR, "leases.sqlite"))
+BATCH_LEASE_TTL = float(os.getenv("BATCH_LEASE_TTL", "600"))
+BATCH_LEASE_MAX_ATTEMPTS = int(os.getenv("BATCH_LEASE_MAX_ATTEMPTS", "3"))
+
+# Projects API cache: results are fresh for PROJECTS_CACHE_TTL seconds, then
+# served stale for up to PROJECTS_CACHE_STALE_TTL more while refreshing
+PROJECTS_CACHE_TTL = float(os.getenv("PROJECTS_CACHE_TTL", "300"))
+PROJECTS_CACHE_STALE_TTL = float(os.getenv("PROJECTS_CACHE_STALE_TTL", "3600"))
+# Distinct pages / projections / details kept in the cache
+PROJECTS_CACHE_MAX_ENTRIES = int(os.getenv("PROJECTS_CACHE_MAX_ENTRIES", "1024"))
+# Page size limits for /api/projects?limit=
+PROJECTS_PAGE_MAX_LIMIT = int(os.getenv("PROJECTS_PAGE_MAX_LIMIT", "1000"))
+# Local Arrow snapshot of final_results_engagement the API serves from. It is
+# persisted as Parquet, refreshed incrementally from processed_documents.processed_at
+# (re-reading OVERLAP seconds before the watermark to catch late rows) and
+# rebuilt in full every FULL_REFRESH_INTERVAL seconds to drop deleted rows
+PROJECTS_SNAPSHOT_ENABLED = os.getenv("PROJECTS_SNAPSHOT_ENABLED", "true").lower() == "true"
+PROJECTS_SNAPSHOT_PATH = os.getenv("PROJECTS_SNAPSHOT_PATH", os.path.join(CACHE_DIR, "projects_snapshot.parquet"))
+PROJECTS_SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("PROJECTS_SNAPSHOT_REFRESH_INTERVAL", "60"))
+PROJECTS_SNAPSHOT_FULL_REFRESH_INTERVAL = float(os.getenv("PROJECTS_SNAPSHOT_FULL_REFRESH_INTERVAL", "86400"))
+PROJECTS_SNAPSHOT_OVERLAP = float(os.getenv("PROJECTS_SNAPSHOT_OVERLAP", "600"))
+# Read project results as Arrow (BigQuery Storage Read API) and transform them
+# column-wise; set to false to fall back to the row-by-row path
+PROJECTS_FETCH_COLUMNAR = os.getenv("PROJECTS_FETCH_COLUMNAR", "true").lower() == "true"
+# Rows per BigQuery result page streamed by /api/projects/export
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+
+# Maximum number of blocking BigQuery fetches the API runs at once in its threadpool
+API_MAX_CONCURRENT_FETCHES = int(os.getenv("API_MAX_CONCURRENT_FETCHES", "8"))
 
 # Define allowed file extensions
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx', 'doc'}
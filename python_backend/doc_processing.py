@@ -22,6 +22,12 @@ from google.cloud import aiplatform
 from google.cloud import logging as cloud_logging
 import uuid
 from vertexai.language_models import TextGenerationModel
+import sys
+
+# Make the python_backend package importable when running this file directly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from python_backend.ai.cache import CachedEmbedding
+from python_backend.config import POLICY_INDEX_CHUNK_SIZE, POLICY_INDEX_CHUNK_OVERLAP
 
 # Load environment variables
 load_dotenv()
@@ -55,10 +61,11 @@ llm = GoogleGenAI(
     max_tokens=1000,
 )
 
-embed_model = GoogleGenAIEmbedding(
+# Only chunks missing from the embedding cache are sent to the API
+embed_model = CachedEmbedding(GoogleGenAIEmbedding(
     model_name="text-embedding-005", #005 is good for english text; multilingual text, text-multilingual-embedding-002
     embed_batch_size=100,
-    vertexai_config=vertexai_config)
+    vertexai_config=vertexai_config))
 
 EMBED_DIMENSIONS = 768
 Settings.llm = llm
@@ -383,12 +390,13 @@ def initialize_policy_index():
             return VectorStoreIndex([], storage_context=storage_context)
             
         # From Document Objects to index - Single step to create index with splitting
-        text_splitter = SentenceSplitter(chunk_size=180, chunk_overlap=10)
+        text_splitter = SentenceSplitter(chunk_size=POLICY_INDEX_CHUNK_SIZE, chunk_overlap=POLICY_INDEX_CHUNK_OVERLAP)
         cloud_logger.info(f"Processing {len(policy_docs)} documents into index")
         policy_index = VectorStoreIndex.from_documents(
             documents=policy_docs,
             transformations=[text_splitter],
-            storage_context=storage_context
+            storage_context=storage_context,
+            embed_model=embed_model
         )
         
         return policy_index
@@ -0,0 +1,483 @@
+"""
+Batch Runner Module
+
+This module runs document ingestion as a pipeline of stages:
+download -> Docling parse -> LLM analysis -> BigQuery write. Each stage has
+its own worker threads and a bounded queue in front of it, so a fast stage
+blocks instead of piling up documents (memory stays flat) and the slowest
+stage sets the throughput of the batch.
+
+Progress is checkpointed in a BatchJournal, so a restarted batch resumes
+each document from its last completed stage. With a lease backend
+(BATCH_LEASE_BACKEND), runners on several machines given the same links
+split them: each document is leased before it is processed, and the
+leases of a crashed runner expire and are claimed by the others.
+
+Usage:
+    python -m python_backend.document.batch [--limit N | --links LINK [LINK ...]]
+        [--download-workers N] [--parse-workers N] [--analysis-workers N] [--queue-size N]
+        [--skip-processed-check] [--no-journal] [--journal-dir DIR]
+        [--lease-backend none|sqlite|bigquery] [--batch-id ID]
+"""
+
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from python_backend.config import (
+    logger, BATCH_DOWNLOAD_WORKERS, BATCH_PARSE_WORKERS, BATCH_ANALYSIS_WORKERS, BATCH_QUEUE_SIZE,
+    BATCH_JOURNAL_ENABLED, BATCH_JOURNAL_DIR, BATCH_LEASE_BACKEND
+)
+from python_backend.document.journal import BatchJournal, DOWNLOADED, PARSED, ANALYZED, WRITTEN
+from python_backend.document.prefetch import DocumentPrefetcher
+from python_backend.document.processor import create_tempfile_path
+from python_backend.document.parsing import load_document_text
+from python_backend.document.query import analyze_document_text, create_policy_docs
+from python_backend.storage.leases import (
+    LeaseStore, LeaseHeartbeat, get_lease_store, default_batch_id, default_worker_id
+)
+from python_backend.storage.bigquery import (
+    get_fa_from_bigquery, get_processed_documents, mark_document_as_processed, get_result_writer
+)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class BatchDocument:
+    """A document moving through the pipeline, with the output of each stage so far."""
+
+    __slots__ = ("link", "temp_file_path", "text", "row")
+
+    def __init__(self, link: str):
+        self.link = link
+        self.temp_file_path = None
+        self.text = None
+        self.row = None
+
+
+class PipelineStage:
+    """
+    One pipeline stage: `workers` threads taking documents from a bounded
+    input queue, applying `func` and putting them on the next stage's queue.
+
+    A document for which `func` raises is handed to `on_error` (with the
+    stage name) and leaves the pipeline.
+    """
+
+    def __init__(self, name: str, func: Callable[[BatchDocument], None], workers: int, queue_size: int,
+                 on_error: Callable[[str, BatchDocument, Exception], None] = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.input = queue.Queue(maxsize=max(1, queue_size))
+        self.output: Optional[queue.Queue] = None
+        self.on_error = on_error
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._active_workers = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"batch-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                document = self.input.get()
+                if document is _DONE:
+                    # Let sibling workers see the end marker too
+                    self.input.put(_DONE)
+                    break
+                self._process(document)
+        finally:
+            # The last worker to finish closes the next stage's input, even if this one died
+            with self._lock:
+                self._active_workers -= 1
+                last = self._active_workers == 0
+            if last and self.output is not None:
+                self.output.put(_DONE)
+
+    def _process(self, document: BatchDocument) -> None:
+        start = time.monotonic()
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = start
+        try:
+            self.func(document)
+            ok = True
+        except Exception as e:
+            ok = False
+            logger.error(f"{self.name} failed for {document.link}: {str(e)}")
+            if self.on_error:
+                try:
+                    self.on_error(self.name, document, e)
+                except Exception as error_handler_error:
+                    logger.error(f"Could not record the {self.name} failure of {document.link}: "
+                                 f"{str(error_handler_error)}")
+        finished = time.monotonic()
+        with self._lock:
+            self.busy_seconds += finished - start
+            self.finished_at = finished
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if ok and self.output is not None:
+            self.output.put(document)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts, busy time, throughput (documents/minute) and worker utilization."""
+        wall = (self.finished_at - self.started_at) if self.started_at and self.finished_at else 0.0
+        return {
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": self.busy_seconds,
+            "docs_per_minute": self.completed / wall * 60 if wall > 0 else 0.0,
+            "utilization": self.busy_seconds / (wall * self.workers) if wall > 0 else 0.0,
+        }
+
+
+class BatchRunner:
+    """
+    Pipelined ingestion of a list of document links.
+
+    Documents already recorded as processed are skipped up front, failures
+    are recorded in processed_documents with their error, and analysis rows
+    are written through the shared ResultWriter.
+
+    With a journal, each stage's result is checkpointed (and intermediate
+    files kept) until the next stage completes; documents the journal has
+    seen enter the pipeline after their last completed stage, and documents
+    whose rows were flushed are skipped.
+
+    With a lease store, documents are claimed `queue_size` at a time just
+    before they enter the pipeline, held with heartbeats while in flight
+    and completed when their row is flushed. A failed document's lease is
+    left to expire, so another runner retries it after the lease TTL. Once
+    nothing is left to claim, the runner waits for the documents other
+    runners hold and takes over those whose leases expire.
+    """
+
+    def __init__(self,
+                 download_workers: int = BATCH_DOWNLOAD_WORKERS,
+                 parse_workers: int = BATCH_PARSE_WORKERS,
+                 analysis_workers: int = BATCH_ANALYSIS_WORKERS,
+                 queue_size: int = BATCH_QUEUE_SIZE,
+                 skip_processed_check: bool = False,
+                 journal: Optional[BatchJournal] = None,
+                 lease_store: Optional[LeaseStore] = None,
+                 worker_id: Optional[str] = None):
+        self.download_workers = download_workers
+        self.parse_workers = parse_workers
+        self.analysis_workers = analysis_workers
+        self.queue_size = queue_size
+        self.skip_processed_check = skip_processed_check
+        self.journal = journal
+        self.lease_store = lease_store
+        self.worker_id = worker_id or default_worker_id()
+        self.writer = get_result_writer()
+        self.policy_doc_list = None
+        self._links = set()
+        # Rows of this run loaded into BigQuery / dead-lettered by the ResultWriter
+        self._written = 0
+        self._dead_lettered = 0
+        self._written_lock = threading.Lock()
+        self._heartbeat = None
+        # Per-backend download limits (DOWNLOAD_CONCURRENCY) still apply
+        self._prefetcher = DocumentPrefetcher(create_tempfile_path)
+
+    def download(self, document: BatchDocument) -> None:
+        document.temp_file_path = self._prefetcher.fetch(document.link)
+        if not document.temp_file_path:
+            raise RuntimeError("Failed to download document")
+        if self.journal:
+            document.temp_file_path = self.journal.record_downloaded(document.link, document.temp_file_path)
+
+    def parse(self, document: BatchDocument) -> None:
+        try:
+            document.text = load_document_text(document.temp_file_path)
+        finally:
+            # The journal keeps the download until the text is recorded
+            if not self.journal:
+                self._remove_temp_file(document)
+        if not document.text:
+            raise RuntimeError("No text extracted from document")
+        if self.journal:
+            self.journal.record_parsed(document.link, document.text)
+            document.temp_file_path = None
+
+    def analyze(self, document: BatchDocument) -> None:
+        document.row = analyze_document_text(document.link, document.text, self.policy_doc_list)
+        # The text is no longer needed; do not keep it queued in front of the writer
+        document.text = None
+        if not document.row:
+            raise RuntimeError("Analysis returned no result")
+        if self.journal:
+            self.journal.record_analyzed(document.link, document.row)
+
+    def write(self, document: BatchDocument) -> None:
+        # Buffered; the ResultWriter marks the document as processed when it flushes
+        self.writer.add(document.row)
+
+    def _remove_temp_file(self, document: BatchDocument) -> None:
+        if document.temp_file_path and os.path.exists(document.temp_file_path):
+            os.remove(document.temp_file_path)
+        document.temp_file_path = None
+
+    def _record_failure(self, stage: str, document: BatchDocument, error: Exception) -> None:
+        if self.journal:
+            # Keep the checkpointed files so a rerun resumes after the last completed stage
+            self.journal.record_failed(document.link, stage, str(error))
+        else:
+            self._remove_temp_file(document)
+        if self._heartbeat:
+            # Stop renewing: the lease expires and the document can be retried elsewhere
+            self._heartbeat.discard([document.link])
+        mark_document_as_processed(document.link, status="failed", error_message=str(error))
+
+    def _record_written(self, rows: List[Dict[str, Any]], dead_lettered: List[Dict[str, Any]]) -> None:
+        links = [row["file_id"] for row in rows if row.get("file_id") in self._links]
+        failed_links = [row["file_id"] for row in dead_lettered if row.get("file_id") in self._links]
+        with self._written_lock:
+            self._written += len(links)
+            self._dead_lettered += len(failed_links)
+        if self.journal:
+            for link in links:
+                self.journal.record_written(link)
+            # The analysis row stays checkpointed, so a rerun retries the write
+            for link in failed_links:
+                self.journal.record_failed(link, "write", "Analysis row could not be loaded into BigQuery")
+        if self.lease_store and links:
+            self.lease_store.complete(self.worker_id, links)
+        if self._heartbeat:
+            # Dead-lettered documents are not renewed: their leases expire
+            self._heartbeat.discard(links + failed_links)
+
+    def resume_stage(self, document: BatchDocument) -> int:
+        """
+        Restore a document's checkpointed results from the journal.
+
+        Returns:
+            int: Index of the stage the document enters the pipeline at
+        """
+        record = self.journal.state(document.link) if self.journal else None
+        if not record:
+            return 0
+        if record["stage"] == ANALYZED:
+            document.row = record["row"]
+            return 3
+        if record["stage"] == PARSED:
+            document.text = self.journal.read_text(record)
+            if document.text:
+                return 2
+        elif record["stage"] == DOWNLOADED and os.path.exists(record["path"]):
+            document.temp_file_path = record["path"]
+            return 1
+        return 0
+
+    def _feed(self, stages: List[PipelineStage], entries: Dict[str, Any]) -> int:
+        """
+        Put documents on the queue of the stage they enter at, claiming them
+        first if there is a lease store. Blocks whenever a queue is full.
+
+        Args:
+            stages: The pipeline stages
+            entries: Dict mapping links to (stage index, BatchDocument)
+
+        Returns:
+            int: Number of documents fed
+        """
+        def put(links):
+            # Later stages first: their end markers only arrive once stage 0 is done
+            for link in sorted(links, key=lambda link: -entries[link][0]):
+                index, document = entries[link]
+                stages[index].input.put(document)
+
+        if not self.lease_store:
+            put(list(entries))
+            return len(entries)
+
+        fed = 0
+        remaining = list(entries)
+        while remaining:
+            claimed = self.lease_store.claim(self.worker_id, remaining, max(1, self.queue_size))
+            if claimed:
+                self._heartbeat.add(claimed)
+                claimed_links = set(claimed)
+                remaining = [link for link in remaining if link not in claimed_links]
+                put(claimed)
+                fed += len(claimed)
+                continue
+            # The rest is leased by other runners: wait until they finish or their leases expire.
+            # Flush first: runners waiting on each other's buffered rows would otherwise stall.
+            self.writer.flush()
+            remaining = self.lease_store.outstanding(remaining)
+            if remaining:
+                logger.info(f"Waiting for {len(remaining)} documents leased by other workers")
+                time.sleep(self._heartbeat.interval)
+        return fed
+
+    def build_stages(self) -> List[PipelineStage]:
+        stages = [
+            PipelineStage("download", self.download, self.download_workers, self.queue_size, self._record_failure),
+            PipelineStage("parse", self.parse, self.parse_workers, self.queue_size, self._record_failure),
+            PipelineStage("analyze", self.analyze, self.analysis_workers, self.queue_size, self._record_failure),
+            PipelineStage("write", self.write, 1, self.queue_size, self._record_failure),
+        ]
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.output = next_stage.input
+        return stages
+
+    def run(self, file_links: List[str]) -> Dict[str, Any]:
+        """
+        Process the links through the pipeline.
+
+        Args:
+            file_links: List of file links (Google Drive URLs or GCS URIs).
+
+        Returns:
+            Dict with the overall counts and each stage's stats
+        """
+        start = time.monotonic()
+        file_links = list(dict.fromkeys(file_links))
+        processed_links = set()
+        if self.journal:
+            processed_links.update(
+                link for link in file_links
+                if (self.journal.state(link) or {}).get("stage") == WRITTEN
+            )
+        if not self.skip_processed_check:
+            processed_links.update(get_processed_documents(
+                [link for link in file_links if link not in processed_links]
+            ))
+        pending_links = [link for link in file_links if link not in processed_links]
+
+        # The stage each document enters at, after the one it last completed
+        entries = {}
+        for link in pending_links:
+            document = BatchDocument(link)
+            entries[link] = (self.resume_stage(document), document)
+        resumed = sum(1 for index, _ in entries.values() if index)
+        logger.info(f"Batch: {len(pending_links)} documents to process "
+                    f"({resumed} resumed), {len(processed_links)} already processed")
+
+        if self.policy_doc_list is None and any(index < 3 for index, _ in entries.values()):
+            self.policy_doc_list = create_policy_docs()
+
+        stages = self.build_stages()
+        self._links = set(pending_links)
+        self._written = self._dead_lettered = 0
+        self.writer.add_flush_callback(self._record_written)
+        if self.lease_store:
+            self._heartbeat = LeaseHeartbeat(self.lease_store, self.worker_id)
+            self._heartbeat.start()
+        try:
+            for stage in stages:
+                stage.start()
+            fed = self._feed(stages, entries)
+            stages[0].input.put(_DONE)
+            for stage in stages:
+                stage.join()
+            flushed = self.writer.flush(force=True)
+        finally:
+            self.writer.remove_flush_callback(self._record_written)
+            if self._heartbeat:
+                self._heartbeat.stop()
+                # Whatever is still held was not written (interrupted run or failed flush)
+                self.lease_store.release(self.worker_id, self._heartbeat.held())
+                self._heartbeat = None
+
+        elapsed = time.monotonic() - start
+        # Counted when the loads succeed; the write stage only buffers rows
+        written = self._written
+        unwritten = stages[-1].completed - written - self._dead_lettered
+        if not flushed and unwritten:
+            logger.error(f"{unwritten} analysis rows could not be written to BigQuery and are still buffered")
+        return {
+            "documents": len(pending_links),
+            "skipped": len(processed_links),
+            # Processed (or given up) by other workers sharing the leases
+            "claimed_elsewhere": len(pending_links) - fed,
+            "written": written,
+            "failed": sum(stage.failed for stage in stages) + self._dead_lettered,
+            # Rows still buffered in the ResultWriter after the final flush failed
+            "unwritten": unwritten,
+            "elapsed_seconds": elapsed,
+            "docs_per_minute": written / elapsed * 60 if elapsed > 0 else 0.0,
+            "stages": {stage.name: stage.stats() for stage in stages},
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable summary of a BatchRunner.run report."""
+    lines = [
+        f"Batch finished in {report['elapsed_seconds']:.1f}s: {report['written']} written, "
+        f"{report['failed']} failed, {report['unwritten']} not yet written, {report['skipped']} skipped, "
+        f"{report['claimed_elsewhere']} left to other workers "
+        f"({report['docs_per_minute']:.1f} docs/min)",
+        f"{'stage':<10}{'workers':>8}{'done':>8}{'failed':>8}{'docs/min':>10}{'busy s':>10}{'util':>7}",
+    ]
+    for name, stats in report["stages"].items():
+        lines.append(
+            f"{name:<10}{stats['workers']:>8}{stats['completed']:>8}{stats['failed']:>8}"
+            f"{stats['docs_per_minute']:>10.1f}{stats['busy_seconds']:>10.1f}{stats['utilization']:>7.0%}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the document ingestion pipeline")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--limit", type=int, default=10, help="Number of FA links to read from BigQuery")
+    source.add_argument("--links", nargs="+", help="Process these links instead")
+    parser.add_argument("--download-workers", type=int, default=BATCH_DOWNLOAD_WORKERS)
+    parser.add_argument("--parse-workers", type=int, default=BATCH_PARSE_WORKERS)
+    parser.add_argument("--analysis-workers", type=int, default=BATCH_ANALYSIS_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=BATCH_QUEUE_SIZE)
+    parser.add_argument("--skip-processed-check", action="store_true")
+    parser.add_argument("--no-journal", action="store_true", help="Do not checkpoint or resume progress")
+    parser.add_argument("--journal-dir", default=BATCH_JOURNAL_DIR)
+    parser.add_argument("--lease-backend", default=BATCH_LEASE_BACKEND, choices=["none", "sqlite", "bigquery"],
+                        help="Share the links with other runners through leases")
+    parser.add_argument("--batch-id", help="Lease scope shared by the runners (default: derived from the links)")
+    args = parser.parse_args()
+
+    links = args.links or get_fa_from_bigquery(number_entries=args.limit)
+    if not links:
+        print("No document links to process")
+        sys.exit(1)
+
+    runner = BatchRunner(
+        download_workers=args.download_workers,
+        parse_workers=args.parse_workers,
+        analysis_workers=args.analysis_workers,
+        queue_size=args.queue_size,
+        skip_processed_check=args.skip_processed_check,
+        journal=BatchJournal(args.journal_dir).open() if BATCH_JOURNAL_ENABLED and not args.no_journal else None,
+        lease_store=get_lease_store(args.batch_id or default_batch_id(links), args.lease_backend),
+    )
+    try:
+        report = runner.run(links)
+    finally:
+        if runner.journal:
+            runner.journal.compact()
+            runner.journal.close()
+    print(format_report(report))
+    sys.exit(1 if report["failed"] or report["unwritten"] else 0)
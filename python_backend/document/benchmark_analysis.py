@@ -0,0 +1,120 @@
+"""
+Benchmark of the analysis modes.
+
+Compares the three-call analysis ("multi") with the single schema-constrained
+call ("single") on input/output tokens, latency and field completeness.
+Both modes bypass the LLM cache: a cache hit would report no latency and
+estimated token counts.
+
+Usage:
+    python -m python_backend.document.benchmark_analysis LINK [LINK ...]
+"""
+
+import sys
+import json
+import time
+import asyncio
+from typing import Any, Dict, List
+
+from python_backend.ai.models import llm, get_structured_llm
+from python_backend.storage.bigquery import schema_to_response_schema
+from python_backend.document.processor import process_document
+from python_backend.document.query import (
+    create_policy_docs, build_summary_prompt, build_sdg_prompt, build_remote_sensing_prompt,
+    build_structured_prompt, merge_analysis_outputs, parse_json_response, get_policy_contexts, run_coroutine,
+)
+
+
+def _token_usage(response, prompt: str) -> Dict[str, int]:
+    """Token counts reported by Gemini, or a 4-characters-per-token estimate."""
+    raw = getattr(response, "raw", None) or {}
+    usage = raw.get("usage_metadata") if isinstance(raw, dict) else None
+    if usage:
+        return {
+            "input_tokens": usage.get("prompt_token_count") or 0,
+            "output_tokens": usage.get("candidates_token_count") or 0,
+        }
+    return {"input_tokens": len(prompt) // 4, "output_tokens": len(response.text) // 4}
+
+
+def _completeness(analysis: Dict[str, Any]) -> float:
+    """Share of the response schema fields that have a non-empty value."""
+    fields = schema_to_response_schema()["properties"]
+    filled = [name for name in fields if analysis.get(name) not in (None, "", [])]
+    return len(filled) / len(fields)
+
+
+async def _run_multi(document_link: str, text: str, policy_doc_list: List[str]) -> Dict[str, Any]:
+    sdg_context, remote_sensing_context = get_policy_contexts(policy_doc_list, "", context_mode="full")
+    prompts = {
+        "summary": build_summary_prompt(text),
+        "sdg": build_sdg_prompt(text, sdg_context),
+        "remote_sensing": build_remote_sensing_prompt(text, remote_sensing_context),
+    }
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(llm.acomplete(prompt, use_cache=False) for prompt in prompts.values()))
+    latency = time.perf_counter() - start
+
+    usages = [_token_usage(response, prompt) for response, prompt in zip(responses, prompts.values())]
+    analysis = merge_analysis_outputs(
+        document_link, {stage: response.text for stage, response in zip(prompts, responses)}
+    )
+    return {
+        "latency_s": latency,
+        "input_tokens": sum(usage["input_tokens"] for usage in usages),
+        "output_tokens": sum(usage["output_tokens"] for usage in usages),
+        "completeness": _completeness(analysis),
+    }
+
+
+async def _run_single(document_link: str, text: str, policy_doc_list: List[str]) -> Dict[str, Any]:
+    sdg_context, remote_sensing_context = get_policy_contexts(policy_doc_list, "", context_mode="full")
+    prompt = build_structured_prompt(text, sdg_context, remote_sensing_context)
+    structured_llm = get_structured_llm(schema_to_response_schema())
+
+    start = time.perf_counter()
+    response = await structured_llm.acomplete(prompt, use_cache=False)
+    latency = time.perf_counter() - start
+
+    usage = _token_usage(response, prompt)
+    analysis = parse_json_response(response.text) or {}
+    return {"latency_s": latency, **usage, "completeness": _completeness(analysis)}
+
+
+def benchmark_analysis_modes(document_links: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run both analysis modes on each document and collect their metrics.
+
+    Args:
+        document_links: Links to project documents.
+
+    Returns:
+        Dict mapping mode name to one metrics dict per document.
+    """
+    policy_doc_list = create_policy_docs()
+    results = {"multi": [], "single": []}
+    for link in document_links:
+        processed_doc = process_document(link)
+        if not processed_doc:
+            print(f"Skipping {link}: could not process document")
+            continue
+        text = processed_doc["text_doc_fa"]
+        results["multi"].append(run_coroutine(_run_multi(link, text, policy_doc_list)))
+        results["single"].append(run_coroutine(_run_single(link, text, policy_doc_list)))
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    results = benchmark_analysis_modes(sys.argv[1:])
+    for mode, runs in results.items():
+        if not runs:
+            continue
+        summary = {
+            metric: sum(run[metric] for run in runs) / len(runs)
+            for metric in ("latency_s", "input_tokens", "output_tokens", "completeness")
+        }
+        print(f"{mode}: {json.dumps(summary, indent=2)}")
@@ -0,0 +1,9 @@
+"""
+Preloaded by the forkserver of the Docling parser pool (see
+parsing.DoclingParserPool): importing it loads the Docling models once, so
+every worker forked from the forkserver starts warm.
+"""
+
+from python_backend.document.parsing import _preload_docling_models
+
+_preload_docling_models()
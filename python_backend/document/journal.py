@@ -0,0 +1,165 @@
+"""
+Batch Checkpoint Journal
+
+Append-only JSONL record of each document's progress through the batch
+pipeline. Every completed stage appends one line with what the next stage
+needs: the downloaded file, the parsed text file or the analysis row.
+Intermediate files are kept under the journal directory until the next
+stage has recorded its own result, so a restarted batch resumes each
+document from its last completed stage without asking BigQuery.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from python_backend.config import logger, BATCH_JOURNAL_DIR
+
+# Stages in pipeline order; a document's state is the last one recorded
+DOWNLOADED = "downloaded"
+PARSED = "parsed"
+ANALYZED = "analyzed"
+WRITTEN = "written"
+STAGES = (DOWNLOADED, PARSED, ANALYZED, WRITTEN)
+# Recorded on errors; does not change the document's state
+FAILED = "failed"
+
+
+class BatchJournal:
+    """
+    Checkpoint journal of a batch directory.
+
+    The latest completed stage of every document is kept in memory and
+    rebuilt from the journal file on open. A torn last line (a crash
+    mid-write) is cut off. Thread-safe: pipeline workers record concurrently.
+    """
+
+    def __init__(self, journal_dir: str = BATCH_JOURNAL_DIR):
+        self.journal_dir = journal_dir
+        self.path = os.path.join(journal_dir, "journal.jsonl")
+        self.artifact_dir = os.path.join(journal_dir, "artifacts")
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def open(self) -> "BatchJournal":
+        """Replay the journal file and open it for appending."""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        self._states = {}
+        if os.path.exists(self.path):
+            complete_size = 0
+            with open(self.path, "rb") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.endswith(b"\n"):
+                        # Torn by a crash mid-write; cut off below so the next record starts on its own line
+                        logger.warning(f"Dropping incomplete last line {line_number} of {self.path}")
+                        break
+                    complete_size += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Ignoring unreadable line {line_number} of {self.path}")
+                        continue
+                    if record.get("stage") in STAGES:
+                        self._states[record["link"]] = record
+            if os.path.getsize(self.path) > complete_size:
+                os.truncate(self.path, complete_size)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def state(self, link: str) -> Optional[Dict[str, Any]]:
+        """
+        Last completed stage of a document.
+
+        Returns:
+            The journal record ("stage" plus that stage's result), or None if nothing was recorded
+        """
+        with self._lock:
+            return self._states.get(link)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record["at"] = datetime.now(timezone.utc).isoformat()
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if record["stage"] in STAGES:
+                self._states[record["link"]] = record
+
+    def artifact_path(self, link: str, suffix: str) -> str:
+        """Where intermediate results of a document are kept."""
+        digest = hashlib.sha256(link.encode("utf-8")).hexdigest()
+        return os.path.join(self.artifact_dir, digest + suffix)
+
+    def _remove_artifact(self, record: Optional[Dict[str, Any]]) -> None:
+        path = record and record.get("path")
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def record_downloaded(self, link: str, temp_file_path: str) -> str:
+        """
+        Move a downloaded file into the journal and record it.
+
+        Returns:
+            str: The file's new path
+        """
+        path = self.artifact_path(link, os.path.splitext(temp_file_path)[1])
+        shutil.move(temp_file_path, path)
+        self._append({"link": link, "stage": DOWNLOADED, "path": path})
+        return path
+
+    def record_parsed(self, link: str, text: str) -> None:
+        """Store the parsed text and drop the downloaded file."""
+        previous = self.state(link)
+        path = self.artifact_path(link, ".txt")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+        self._append({"link": link, "stage": PARSED, "path": path})
+        if previous and previous["stage"] == DOWNLOADED:
+            self._remove_artifact(previous)
+
+    def record_analyzed(self, link: str, row: Dict[str, Any]) -> None:
+        """Record the analysis row and drop the parsed text."""
+        previous = self.state(link)
+        self._append({"link": link, "stage": ANALYZED, "row": row})
+        if previous and previous["stage"] in (DOWNLOADED, PARSED):
+            self._remove_artifact(previous)
+
+    def record_written(self, link: str) -> None:
+        self._append({"link": link, "stage": WRITTEN})
+
+    def record_failed(self, link: str, stage: str, error: str) -> None:
+        """Record an error; the document keeps its last completed stage."""
+        self._append({"link": link, "stage": FAILED, "failed_stage": stage, "error": error})
+
+    def read_text(self, record: Dict[str, Any]) -> Optional[str]:
+        """Parsed text of a PARSED record, or None if its file is gone."""
+        if not os.path.exists(record["path"]):
+            return None
+        with open(record["path"], "r", encoding="utf-8") as f:
+            return f.read()
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the latest state of each document."""
+        with self._lock:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for record in self._states.values():
+                    f.write(json.dumps(record, default=str) + "\n")
+            if self._file:
+                self._file.close()
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
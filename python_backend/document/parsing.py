@@ -0,0 +1,232 @@
+"""
+Document Parsing Module
+
+This module wraps Docling parsing behind a persistent parsed-text cache, so
+a document whose content has not changed is never parsed twice, and can
+spread parsing over a pool of warm worker processes.
+"""
+
+import os
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from importlib import metadata
+from typing import Optional
+
+from llama_index.readers.docling import DoclingReader
+
+from python_backend.config import (
+    logger, PARSE_CACHE_ENABLED, PARSE_CACHE_PATH, DOCLING_WORKERS, DOCLING_MAX_TASKS_PER_WORKER
+)
+from python_backend.utils.cache import SQLiteCache
+
+# Initialize the DoclingReader (moved from global scope in doc_processing.py)
+docling_reader = DoclingReader()
+
+parse_cache = SQLiteCache(PARSE_CACHE_PATH)
+
+
+def _package_version(name: str) -> str:
+    """Installed version of a package, or 'unknown'."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+# Anything that changes Docling's output must change this signature
+PARSER_SIGNATURE = "|".join([
+    f"docling={_package_version('docling')}",
+    f"llama-index-readers-docling={_package_version('llama-index-readers-docling')}",
+    f"export_type={getattr(docling_reader, 'export_type', None)}",
+])
+
+
+def file_content_hash(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file's content.
+
+    Args:
+        file_path: Path to the file.
+
+    Returns:
+        Hex digest of the file content.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def parse_cache_key(file_path: str) -> str:
+    """Cache key for the parsed text of a file: content hash plus parser signature."""
+    return f"{file_content_hash(file_path)}:{PARSER_SIGNATURE}"
+
+
+def parse_with_docling(file_path: str, reader: Optional[DoclingReader] = None) -> str:
+    """
+    Parse a file with Docling and join its text.
+
+    Args:
+        file_path: Path to the document.
+        reader: DoclingReader to use; defaults to the module instance.
+
+    Returns:
+        The document text.
+    """
+    docs = (reader or docling_reader).load_data(file_path)
+    return ' '.join(doc.text.strip() for doc in docs)
+
+
+# Reader used inside a pool worker; set by the worker initializer
+_worker_reader = None
+
+
+def _preload_docling_models() -> None:
+    """
+    Build the Docling PDF pipeline in this process.
+
+    Run in the pool's forkserver (see docling_worker): the workers forked
+    from it share the loaded layout and OCR models copy-on-write instead of
+    each loading their own.
+    """
+    try:
+        from docling.datamodel.base_models import InputFormat
+        converter = getattr(docling_reader, 'doc_converter', None) or getattr(docling_reader, '_doc_converter', None)
+        if converter is not None:
+            converter.initialize_pipeline(InputFormat.PDF)
+            logger.info("Preloaded Docling PDF pipeline")
+    except Exception as e:
+        logger.warning(f"Could not preload Docling models, workers will load them lazily: {str(e)}")
+
+
+def _init_parser_worker(start_method: str) -> None:
+    """Pool initializer: build (or inherit) the worker's DoclingReader once."""
+    global _worker_reader
+    if start_method == 'forkserver':
+        # Inherited from the forkserver together with its preloaded models
+        _worker_reader = docling_reader
+    else:
+        _worker_reader = DoclingReader()
+
+
+def _parse_in_worker(file_path: str) -> str:
+    """Pool task: parse one file with the worker's reader."""
+    return parse_with_docling(file_path, _worker_reader)
+
+
+class DoclingParserPool:
+    """
+    Process pool of warm Docling workers.
+
+    Each worker builds its DoclingReader once and is replaced after
+    `max_tasks_per_worker` documents so that memory growth in Docling stays
+    bounded over long batches.
+
+    Workers are forked from a forkserver, never from this process: the pool
+    is started and refilled while download and pipeline threads are running,
+    and forking a multi-threaded process can deadlock the child on a lock
+    another thread held. The forkserver is a fresh single-threaded process
+    that loads the Docling models once before forking workers.
+    """
+
+    def __init__(self, workers: int = DOCLING_WORKERS, max_tasks_per_worker: int = DOCLING_MAX_TASKS_PER_WORKER):
+        self.workers = workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Preload models and start the workers (no-op if already started)."""
+        with self._lock:
+            if self._pool is not None:
+                return
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            context = multiprocessing.get_context(start_method)
+            if start_method == 'forkserver':
+                context.set_forkserver_preload(['python_backend.document.docling_worker'])
+            self._pool = context.Pool(
+                processes=self.workers,
+                initializer=_init_parser_worker,
+                initargs=(start_method,),
+                maxtasksperchild=self.max_tasks_per_worker or None,
+            )
+            logger.info(f"Started Docling parser pool with {self.workers} workers ({start_method})")
+
+    def parse(self, file_path: str) -> str:
+        """
+        Parse a file on one of the workers, blocking until it is done.
+
+        Args:
+            file_path: Path to the document, readable by the workers.
+
+        Returns:
+            The document text.
+        """
+        self.start()
+        return self._pool.apply(_parse_in_worker, (file_path,))
+
+    def close(self) -> None:
+        """Stop the workers after their current tasks."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+
+_parser_pool = None
+
+
+def get_parser_pool() -> Optional[DoclingParserPool]:
+    """Get the shared parser pool, or None when parsing runs in-process."""
+    global _parser_pool
+    if DOCLING_WORKERS <= 1:
+        return None
+    if _parser_pool is None:
+        _parser_pool = DoclingParserPool()
+        atexit.register(_parser_pool.close)
+    return _parser_pool
+
+
+def parse_document(file_path: str) -> str:
+    """
+    Parse a document on the worker pool if one is configured, else in-process.
+
+    Args:
+        file_path: Path to the document.
+
+    Returns:
+        The document text.
+    """
+    pool = get_parser_pool()
+    if pool is not None:
+        return pool.parse(file_path)
+    return parse_with_docling(file_path)
+
+
+def load_document_text(file_path: str) -> str:
+    """
+    Return the text of a document, parsing it with Docling only on a cache miss.
+
+    Args:
+        file_path: Path to the document.
+
+    Returns:
+        The document text.
+    """
+    if not PARSE_CACHE_ENABLED:
+        return parse_document(file_path)
+
+    cache_key = parse_cache_key(file_path)
+    cached = parse_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Parse cache hit for {os.path.basename(file_path)} ({parse_cache.stats()})")
+        return cached.decode('utf-8')
+
+    text = parse_document(file_path)
+    parse_cache.set(cache_key, text.encode('utf-8'))
+    logger.info(f"Parse cache miss for {os.path.basename(file_path)} ({parse_cache.stats()})")
+    return text
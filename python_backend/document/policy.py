@@ -0,0 +1,272 @@
+"""
+Policy Corpus Module
+
+This module keeps the text of the SDG and remote-sensing policy documents
+resident in memory. The documents are parsed once, persisted locally with
+a version stamp made of their GCS generations, and only re-parsed when a
+policy file under POLICY_PATH changes.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from python_backend.config import (
+    logger, DOCUMENTS_BUCKET, POLICY_FOLDER, POLICY_DOC_FILES, POLICY_CORPUS_PATH, POLICY_CHECK_INTERVAL,
+    POLICY_INDEX_DIR, POLICY_CONTEXT_TOP_K, POLICY_CONTEXT_TOKEN_BUDGET,
+    POLICY_INDEX_CHUNK_SIZE, POLICY_INDEX_CHUNK_OVERLAP
+)
+from python_backend.storage.gcs import list_files, download_file
+from python_backend.document.parsing import load_document_text
+
+# The first documents of the corpus are SDG indicator documents, the rest
+# describe remote sensing tools
+SDG_POLICY_DOC_COUNT = 2
+
+
+class PolicyCorpus:
+    """
+    In-memory policy corpus with GCS-generation based refresh.
+
+    `get_texts()` is cheap to call for every project document: the GCS
+    listing is consulted at most once every `check_interval` seconds and a
+    policy file is only parsed again when its generation changes.
+    """
+
+    def __init__(self,
+                 folder: str = POLICY_FOLDER,
+                 doc_names: List[str] = None,
+                 state_path: str = POLICY_CORPUS_PATH,
+                 check_interval: float = POLICY_CHECK_INTERVAL):
+        self.folder = folder
+        self.doc_names = doc_names if doc_names is not None else POLICY_DOC_FILES
+        self.state_path = state_path
+        self.check_interval = check_interval
+        self._versions: Dict[str, int] = {}
+        self._texts: Dict[str, str] = {}
+        self._last_checked = 0.0
+        self._lock = threading.Lock()
+
+    def _list_versions(self) -> Optional[Dict[str, int]]:
+        """Current {blob name: generation} of the policy folder, or None if listing failed."""
+        blobs = list_files(self.folder)
+        if blobs is None:
+            return None
+        return {blob.name: blob.generation for blob in blobs}
+
+    def _load_state(self) -> None:
+        """Load the persisted corpus, if any, into memory."""
+        if self._texts or not os.path.exists(self.state_path):
+            return
+        try:
+            with gzip.open(self.state_path, 'rt', encoding='utf-8') as f:
+                state = json.load(f)
+            self._versions = state.get("versions", {})
+            self._texts = state.get("texts", {})
+            logger.info(f"Loaded {len(self._texts)} policy documents from {self.state_path}")
+        except Exception as e:
+            logger.warning(f"Could not load persisted policy corpus: {str(e)}")
+
+    def _save_state(self) -> None:
+        """Persist the corpus and its version stamp."""
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            temp_path = f"{self.state_path}.tmp"
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump({"versions": self._versions, "texts": self._texts}, f)
+            os.replace(temp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Could not persist policy corpus: {str(e)}")
+
+    def _parse_blob(self, blob_name: str) -> Optional[str]:
+        """Download and parse one policy document."""
+        temp_file_path = download_file(f"gs://{DOCUMENTS_BUCKET}/{blob_name}")
+        if not temp_file_path:
+            return None
+        try:
+            return load_document_text(temp_file_path)
+        finally:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Bring the corpus up to date with the policy folder.
+
+        Args:
+            force: Check GCS even if the last check is more recent than check_interval.
+        """
+        with self._lock:
+            self._load_state()
+            if not force and self._texts and time.time() - self._last_checked < self.check_interval:
+                return
+
+            versions = self._list_versions()
+            self._last_checked = time.time()
+            if versions is None:
+                logger.warning("Could not list policy documents, serving the last known corpus")
+                return
+            if versions == self._versions and set(versions) == set(self._texts):
+                return
+
+            texts = {}
+            for blob_name, generation in versions.items():
+                if self._versions.get(blob_name) == generation and blob_name in self._texts:
+                    texts[blob_name] = self._texts[blob_name]
+                    continue
+                logger.info(f"Parsing policy document {blob_name} (generation {generation})")
+                text = self._parse_blob(blob_name)
+                if text is None:
+                    logger.error(f"Failed to load policy document {blob_name}")
+                    # Leave it out of the stamp so the next refresh retries it
+                    continue
+                texts[blob_name] = text
+
+            self._versions = {name: versions[name] for name in texts}
+            self._texts = texts
+            self._save_state()
+            logger.info(f"Policy corpus refreshed: {len(texts)} documents")
+
+    def version_stamp(self) -> str:
+        """Short hash of the current policy file generations and document order."""
+        payload = json.dumps([self._versions, self.doc_names], sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def get_documents(self) -> List[Tuple[str, str]]:
+        """
+        Return the policy documents as (file name, text) pairs.
+
+        Returns:
+            Documents ordered as POLICY_DOC_FILES (file names), or by blob name if unset.
+        """
+        self.refresh()
+        by_file_name = {os.path.basename(name): text for name, text in self._texts.items()}
+        if self.doc_names:
+            missing = [name for name in self.doc_names if name not in by_file_name]
+            if missing:
+                raise ValueError(f"Policy documents not found under {self.folder}: {missing}")
+            return [(name, by_file_name[name]) for name in self.doc_names]
+        return [(os.path.basename(name), self._texts[name]) for name in sorted(self._texts)]
+
+    def get_texts(self) -> List[str]:
+        """
+        Return the policy document texts.
+
+        Returns:
+            Texts ordered as POLICY_DOC_FILES (file names), or by blob name if unset.
+        """
+        return [text for _, text in self.get_documents()]
+
+
+def policy_category(position: int) -> str:
+    """Category of the policy document at a position in the corpus order."""
+    return "sdg" if position < SDG_POLICY_DOC_COUNT else "remote_sensing"
+
+
+class PolicyContextIndex:
+    """
+    Vector index over the policy corpus for retrieval-based prompt context.
+
+    The index is built once per corpus version and chunking and persisted
+    in Chroma, so each project only pays for an embedding lookup of its
+    summary instead of pasting the full policy documents into the prompt.
+    A collection is only reused once its metadata marks the build complete;
+    one left partial by a crash or an embedding error is rebuilt.
+    """
+
+    def __init__(self, corpus: PolicyCorpus, persist_dir: str = POLICY_INDEX_DIR):
+        self.corpus = corpus
+        self.persist_dir = persist_dir
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _get_index(self):
+        """Build or load the index for the current corpus version."""
+        import chromadb
+        from llama_index.core import Document, StorageContext, VectorStoreIndex
+        from llama_index.core.node_parser import SentenceSplitter
+        from llama_index.vector_stores.chroma import ChromaVectorStore
+        from python_backend.ai.models import embed_model
+
+        with self._lock:
+            documents = self.corpus.get_documents()
+            version = self.corpus.version_stamp()
+            if self._index is not None and self._version == version:
+                return self._index
+
+            chroma_client = chromadb.PersistentClient(path=self.persist_dir)
+            collection_name = f"policy-{version}-{POLICY_INDEX_CHUNK_SIZE}-{POLICY_INDEX_CHUNK_OVERLAP}"
+            chroma_collection = chroma_client.get_or_create_collection(collection_name)
+
+            if (chroma_collection.metadata or {}).get("complete"):
+                logger.info(f"Loaded policy index {collection_name}")
+                vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
+                index = VectorStoreIndex.from_vector_store(vector_store, embed_model=embed_model)
+            else:
+                if chroma_collection.count() > 0:
+                    logger.warning(f"Policy index {collection_name} is incomplete, rebuilding it")
+                    chroma_client.delete_collection(collection_name)
+                    chroma_collection = chroma_client.create_collection(collection_name)
+                logger.info(f"Building policy index {collection_name} from {len(documents)} documents")
+                policy_docs = [
+                    Document(text=text, metadata={"file_name": name, "category": policy_category(i)})
+                    for i, (name, text) in enumerate(documents)
+                ]
+                vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
+                index = VectorStoreIndex.from_documents(
+                    documents=policy_docs,
+                    transformations=[SentenceSplitter(chunk_size=POLICY_INDEX_CHUNK_SIZE,
+                                                      chunk_overlap=POLICY_INDEX_CHUNK_OVERLAP)],
+                    storage_context=StorageContext.from_defaults(vector_store=vector_store),
+                    embed_model=embed_model,
+                )
+                chroma_collection.modify(metadata={"complete": True})
+
+            self._index, self._version = index, version
+            return index
+
+    def retrieve(self, query: str, category: str,
+                 top_k: int = POLICY_CONTEXT_TOP_K,
+                 token_budget: int = POLICY_CONTEXT_TOKEN_BUDGET) -> str:
+        """
+        Retrieve the policy passages most relevant to a query.
+
+        Args:
+            query: Text to match, typically the project summary.
+            category: "sdg" or "remote_sensing".
+            top_k: Number of passages to retrieve.
+            token_budget: Approximate maximum size of the returned context in tokens.
+
+        Returns:
+            The passages joined into one context string, best match first.
+        """
+        from llama_index.core.vector_stores import MetadataFilters, ExactMatchFilter
+
+        retriever = self._get_index().as_retriever(
+            similarity_top_k=top_k,
+            filters=MetadataFilters(filters=[ExactMatchFilter(key="category", value=category)]),
+        )
+        nodes = retriever.retrieve(query)
+
+        # Roughly 4 characters per token
+        char_budget = token_budget * 4
+        passages = []
+        used = 0
+        for node in nodes:
+            text = node.node.get_content().strip()
+            if used + len(text) > char_budget:
+                break
+            passages.append(text)
+            used += len(text)
+        logger.info(f"Retrieved {len(passages)} {category} policy passages (~{used // 4} tokens)")
+        return "\n\n".join(passages)
+
+
+# Create singleton instances
+policy_corpus = PolicyCorpus()
+policy_context_index = PolicyContextIndex(policy_corpus)
@@ -1,20 +1,24 @@
 import os
 import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, Dict, List
 
 from llama_index.core import VectorStoreIndex, StorageContext
 from llama_index.core.node_parser import SentenceSplitter
-from llama_index.readers.docling import DoclingReader
 
 import sys
 sys.path.append('/Users/beckyxu/Documents/GitHub/sgd-insight-engine')
 
-from python_backend.config import logger
+from python_backend.config import logger, DOWNLOAD_PREFETCH, DOCLING_WORKERS
 from python_backend.storage.drive import download_file as drive_download
 from python_backend.storage.gcs import download_file as gcs_download, upload_file
-from python_backend.storage.bigquery import is_document_already_processed, mark_document_as_processed
+from python_backend.storage.bigquery import get_processed_documents, mark_document_as_processed
+from python_backend.storage.download_cache import download_cache, drive_cache_key, gcs_cache_key, http_cache_key
 from python_backend.utils.logging import sanitize_metadata_for_chroma
 from python_backend.ai.models import text_splitter, embed_model  # Import AI models
+from python_backend.document.prefetch import DocumentPrefetcher
+from python_backend.document.parsing import docling_reader, load_document_text
 
 import re
 import io
@@ -28,9 +32,6 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 import requests
 import logging
-# Initialize the DoclingReader (moved from global scope in doc_processing.py)
-docling_reader = DoclingReader()
-
 def create_vector_index(file_path: str, index_name: str = None) -> Tuple[Optional[VectorStoreIndex], Optional[str]]:
     """
     Create a vector index for a document.
@@ -74,7 +75,8 @@ def create_vector_index(file_path: str, index_name: str = None) -> Tuple[Optiona
         index = VectorStoreIndex.from_documents(
             documents=docs,
             transformations=[text_splitter],
-            storage_context=storage_context
+            storage_context=storage_context,
+            embed_model=embed_model
         )
         
         return index, document_description
@@ -83,12 +85,14 @@ def create_vector_index(file_path: str, index_name: str = None) -> Tuple[Optiona
         logger.error(f"Error creating vector index for {file_path}: {str(e)}")
         return None, None
 
-def process_document(file_link: str) -> Optional[Dict]:
+def process_document(file_link: str, temp_file_path: Optional[str] = None) -> Optional[Dict]:
     """
     Process a document and create complete text.
     
     Args:
         file_link: The link to the document.
+        temp_file_path: Optional path to an already downloaded copy of the document
+                        (e.g. from the prefetch stage). It is removed once parsed.
         
     Returns:
         Dict with index information {"file_id": file_link used as the id, "text_doc_fa": text_doc_fa} 
@@ -97,17 +101,15 @@ def process_document(file_link: str) -> Optional[Dict]:
     try:
         logger.info(f"Processing document: {file_link}")
         
-        # Download file
-        temp_file_path = create_tempfile_path(file_link)
+        # Download file unless the prefetch stage already did
+        if not temp_file_path:
+            temp_file_path = create_tempfile_path(file_link)
         if not temp_file_path:
             logger.error(f"Failed to download document: {file_link}")
             return None
             
         try:
-            # Create a unique index ID for this document
-            file_id = os.path.basename(file_link) # return this 
-            docs = docling_reader.load_data(temp_file_path)
-            text_doc_fa = ' '.join(doc.text.strip() for doc in docs) # return this 
+            text_doc_fa = load_document_text(temp_file_path) # return this 
             
             return {
                 "file_id": file_link,
@@ -125,70 +127,90 @@ def process_document(file_link: str) -> Optional[Dict]:
 
 def process_document_links(file_links: List[str], 
                           index_name: str = 'project-documents-index', 
-                          skip_processed_check: bool = False) -> Dict:
+                          skip_processed_check: bool = False,
+                          prefetch: int = DOWNLOAD_PREFETCH,
+                          parse_workers: int = DOCLING_WORKERS) -> Dict:
     """
-    Process a list of document links and create indices for each document.
+    Process a list of document links and extract the text of each document.
+    
+    Downloads run ahead of parsing in a bounded background stage (see
+    DocumentPrefetcher), so network wait overlaps with Docling work, and up
+    to parse_workers documents are parsed concurrently.
     
     Args:
         file_links: List of file links (Google Drive URLs or GCS URIs).
         index_name: Base name for the vector indices.
         skip_processed_check: If True, skips checking if documents have already been processed
                              (useful for bulk processing of known new documents).
+        prefetch: Number of documents downloaded ahead of the one being processed.
+        parse_workers: Number of documents parsed concurrently.
         
     Returns:
-        Dict mapping document descriptions to their indices.
+        Dict mapping file links to their processed document.
     """
     indices_dict = {}
-    processed_count = 0
-    error_count = 0
     skipped_count = 0
     
     logger.info(f"Processing {len(file_links)} documents" + 
                (" (skipping processed check)" if skip_processed_check else ""))
     
-    for i, link in enumerate(file_links):
-        logger.info(f"Processing document {i+1}/{len(file_links)}: {link}")
-        
-        # Check if document has already been processed (unless skipped)
-        document_index_name = f"{index_name}"
-        if not skip_processed_check and is_document_already_processed(link, document_index_name):
+    # Check which documents have already been processed (unless skipped), in one query
+    processed_links = set() if skip_processed_check else get_processed_documents(file_links)
+    pending_links = []
+    for link in file_links:
+        if link in processed_links:
             logger.info(f"Document already processed, skipping: {link}")
             skipped_count += 1
             continue
-        
+        pending_links.append(link)
+    
+    counts = {"processed": 0, "errors": 0}
+    
+    def record_result(i: int, link: str, future) -> None:
+        """Collect one parsed document and record its processing state."""
         try:
-            result = process_document(
-                file_link=link,
-                index_name=document_index_name
-            )
+            result = future.result() if future else None
             
             if result:
-                indices_dict[result["description"]] = {
-                    "index": result["index"], 
-                    "file_link": link
-                }
-                processed_count += 1
+                indices_dict[link] = result
+                counts["processed"] += 1
                 # Mark as successfully processed
-                mark_document_as_processed(link, document_index_name)
+                mark_document_as_processed(link)
             else:
-                error_count += 1
+                counts["errors"] += 1
                 # Mark as failed
-                mark_document_as_processed(link, document_index_name, 
+                mark_document_as_processed(link, 
                                           status="failed", 
-                                          error_message="Failed to create index")
+                                          error_message="Failed to download or parse document")
         except Exception as e:
             error_message = str(e)
             logger.error(f"Error processing document {link}: {error_message}")
-            error_count += 1
+            counts["errors"] += 1
             # Mark as failed with error message
-            mark_document_as_processed(link, document_index_name, 
+            mark_document_as_processed(link, 
                                       status="failed", 
                                       error_message=error_message)
         
         # Optional: Log progress every 10 files
         if i % 10 == 0 and i > 0:
-            logger.info(f"Progress: {i}/{len(file_links)} files processed")
+            logger.info(f"Progress: {i}/{len(pending_links)} files processed")
+    
+    # Up to parse_workers documents are parsed at once (on the Docling
+    # process pool when DOCLING_WORKERS > 1); results are recorded in order
+    prefetcher = DocumentPrefetcher(create_tempfile_path, prefetch=prefetch)
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max(1, parse_workers), thread_name_prefix="doc-parse") as executor:
+        for i, (link, temp_file_path) in enumerate(prefetcher.iter_downloads(pending_links)):
+            logger.info(f"Processing document {i+1}/{len(pending_links)}: {link}")
+            future = executor.submit(process_document, link, temp_file_path) if temp_file_path else None
+            in_flight.append((i, link, future))
+            if len(in_flight) >= max(1, parse_workers):
+                record_result(*in_flight.popleft())
+        while in_flight:
+            record_result(*in_flight.popleft())
     
+    processed_count = counts["processed"]
+    error_count = counts["errors"]
     logger.info(f"Indexing complete. Successfully processed {processed_count} files. Errors: {error_count}. Skipped: {skipped_count}")
     return indices_dict
 
@@ -252,6 +274,12 @@ def _download_from_google_drive(file_link: str) -> Optional[str]:
         if not file_metadata:
             return None
 
+        cache_key = drive_cache_key(file_id, file_metadata)
+        if cache_key:
+            cached_path = download_cache.get(cache_key)
+            if cached_path:
+                return cached_path
+
         file_name = file_metadata.get('name', 'unknown_file')
         mime_type = file_metadata.get('mimeType', 'application/octet-stream')
 
@@ -290,6 +318,8 @@ def _download_from_google_drive(file_link: str) -> Optional[str]:
         fh.close()
 
         cloud_logger.info(f"{log_message} to {temp_file_path}")
+        if cache_key:
+            download_cache.put(cache_key, temp_file_path)
         return temp_file_path
 
     except Exception as e:
@@ -310,7 +340,18 @@ def _download_from_gcs(file_link: str) -> Optional[str]:
 
     try:
         bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
+        # get_blob loads metadata, including the generation used as cache key
+        blob = bucket.get_blob(blob_name)
+        if blob is None:
+            cloud_logger.error(f"GCS object not found: {file_link}")
+            return None
+
+        cache_key = gcs_cache_key(bucket_name, blob_name, blob.generation)
+        if cache_key:
+            cached_path = download_cache.get(cache_key)
+            if cached_path:
+                return cached_path
+
         content_type = blob.content_type or 'application/octet-stream'
         file_extension = mimetypes.guess_extension(content_type) or '.bin'
 
@@ -319,6 +360,8 @@ def _download_from_gcs(file_link: str) -> Optional[str]:
             blob.download_to_filename(temp_file_path)
 
         cloud_logger.info(f"Downloaded {blob_name} to {temp_file_path}")
+        if cache_key:
+            download_cache.put(cache_key, temp_file_path)
         return temp_file_path
     except Exception as e:
         cloud_logger.error(f"Error downloading from GCS: {str(e)}")
@@ -327,7 +370,19 @@ def _download_from_gcs(file_link: str) -> Optional[str]:
 def _download_from_http(file_link: str) -> Optional[str]:
     """Download a file from an HTTP/HTTPS URL and return the temporary file path."""
     try:
-        response = requests.get(file_link, stream=True, timeout=30)
+        # Revalidate a cached copy with its ETag instead of downloading it again
+        cache_key = http_cache_key(file_link)
+        cached_entry = download_cache.lookup(cache_key)
+        headers = {}
+        if cached_entry and cached_entry.get("etag"):
+            headers["If-None-Match"] = cached_entry["etag"]
+
+        response = requests.get(file_link, stream=True, timeout=30, headers=headers)
+        if response.status_code == 304:
+            cached_path = download_cache.get(cache_key)
+            if cached_path:
+                return cached_path
+            response = requests.get(file_link, stream=True, timeout=30)
         if response.status_code != 200:
             cloud_logger.error(f"Failed to download file: HTTP {response.status_code}")
             return None
@@ -342,6 +397,9 @@ def _download_from_http(file_link: str) -> Optional[str]:
                     temp_file.write(chunk)
 
         cloud_logger.info(f"Downloaded {file_link} to {temp_file_path}")
+        etag = response.headers.get('ETag')
+        if etag:
+            download_cache.put(cache_key, temp_file_path, etag=etag)
         return temp_file_path
     except Exception as e:
         cloud_logger.error(f"Error downloading from HTTP/HTTPS: {str(e)}")
@@ -391,7 +449,7 @@ def _get_drive_file_metadata(drive_service, file_id: str) -> Optional[dict]:
     try:
         metadata = drive_service.files().get(
             fileId=file_id,
-            fields='name,mimeType',
+            fields='name,mimeType,modifiedTime,md5Checksum',
             supportsAllDrives=True
         ).execute()
         cloud_logger.info(f"Successfully found file: {metadata.get('name', 'unknown')}")
@@ -402,7 +460,7 @@ def _get_drive_file_metadata(drive_service, file_id: str) -> Optional[dict]:
 
         results = drive_service.files().list(
             q=f"'{file_id}' in parents",
-            fields="files(id,name,mimeType)",
+            fields="files(id,name,mimeType,modifiedTime,md5Checksum)",
             includeItemsFromAllDrives=True,
             supportsAllDrives=True,
             corpora="allDrives"
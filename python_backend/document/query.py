@@ -1,5 +1,8 @@
 import os
-from typing import Dict, List, Optional, Any
+import json
+import asyncio
+import threading
+from typing import Dict, List, Optional, Any, Tuple
 import datetime
 
 from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage
@@ -13,89 +16,53 @@ import time
 import sys
 sys.path.append('/Users/beckyxu/Documents/GitHub/sgd-insight-engine')
 
-from python_backend.config import logger, POLICY_FOLDER, GCP_PROJECT_ID, GCP_LOCATION, DOCUMENTS_BUCKET
-from python_backend.storage.bigquery import get_fa_from_bigquery
+from python_backend.config import (
+    logger, POLICY_FOLDER, GCP_PROJECT_ID, GCP_LOCATION, DOCUMENTS_BUCKET,
+    ANALYSIS_STAGE_TIMEOUTS, ANALYSIS_DEFAULT_TIMEOUT, ANALYSIS_MODE, POLICY_CONTEXT_MODE
+)
+from python_backend.storage.bigquery import get_fa_from_bigquery, schema_to_response_schema
 from python_backend.storage.gcs import ensure_bucket_exists
-from python_backend.ai.models import llm, embed_model
-from python_backend.document.processor import process_document_links, create_tempfile_path, docling_reader
+from python_backend.ai.models import llm, embed_model, get_structured_llm
+from python_backend.document.processor import process_document, process_document_links, create_tempfile_path, docling_reader
+from python_backend.document.parsing import load_document_text
+from python_backend.document.policy import policy_corpus, policy_context_index, SDG_POLICY_DOC_COUNT
 
 
 def create_policy_docs(
     policy_links: List[str] = None, 
-    ) -> Dict:
+    ) -> List[str]:
     """
-    Initialize indices for policy documents using the existing ChromaDB collection.
+    Load the text of the policy documents.
+    
+    By default the texts come from the resident policy corpus, which parses
+    the documents under POLICY_PATH once and only re-parses a file when its
+    GCS generation changes.
     
     Args:
-        policy_links: Optional list of policy document links (not used when loading from existing ChromaDB).
-        folder_name: Folder in GCS for the vector indices.
-        index_name: Base name for the vector indices.
+        policy_links: Optional list of policy document links to load instead of the policy folder.
         
     Returns:
-        Dict mapping document descriptions to their indices.
+        List of policy document texts: SDG documents first, then remote sensing documents.
     """
-    # 1. create combinedtext for each document
-    # file 1 SDG
-    file_path = FILEPATHHERE
-    docs = docling_reader.load_data(file_path)
-    text_doc1_sdg = ' '.join(doc.text.strip() for doc in docs)
-    
-    # file 2 SDG
-    file_path = FILEPATHHERE
-    docs = docling_reader.load_data(file_path)
-    text_doc2_sdg = ' '.join(doc.text.strip() for doc in docs)
-    
-    # file 3 RS
-    file_path = FILEPATHHERE
-    docs = docling_reader.load_data(file_path)
-    text_doc1_rs = ' '.join(doc.text.strip() for doc in docs)
-    
-    # file 4 RS
-    file_path = FILEPATHHERE
-    docs = docling_reader.load_data(file_path)
-    text_doc2_rs = ' '.join(doc.text.strip() for doc in docs)
-    
-    # file 5 RS
-    file_path = FILEPATHHERE
-    docs = docling_reader.load_data(file_path)
-    text_doc3_rs = ' '.join(doc.text.strip() for doc in docs)
+    if policy_links is None:
+        return policy_corpus.get_texts()
     
-    return [text_doc1_sdg, text_doc2_sdg, text_doc1_rs, text_doc2_rs, text_doc3_rs] 
+    policy_texts = []
+    for link in policy_links:
+        file_path = create_tempfile_path(link)
+        if not file_path:
+            raise ValueError(f"Failed to download policy document: {link}")
+        try:
+            policy_texts.append(load_document_text(file_path))
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    return policy_texts
 
-def answer_question_from_document_link(document_link: str) -> Dict[str, Any]:
-    """
-    Answer a question based on a document link and policy indices.
-    First extracts information from policy documents, then uses that to analyze the project document.
-    
-    Args:
-        document_link: The link to the project document to analyze.
-                
-    Returns:
-        Dict containing the structured analysis and relevant context.
-    """
-    import json
-    
-    logger.info(f"Processing document link: {document_link}")
-    
-    # Step 1: load policy context docs
-    try:
-        policy_doc_list = create_policy_docs()
-        logger.info(f"Initialized {len(policy_doc_list)} policy document")
-    except Exception as e:
-        logger.error(f"Error initializing policy docments: {str(e)}")
-        return {}
+# Characters of the project text used as retrieval query when no summary is available
+RETRIEVAL_QUERY_CHARS = 8000
 
-    # Step 2: Download and analyze the project document 
-    try:
-        processed_doc = process_document(document_link) 
-        project_doc_text = processed_doc['text_doc_fa'] 
-    except Exception as e:
-        logger.error(f"Error initializing project fa doc: {str(e)}")
-        return {}
-    
-    # Step 3: Extract data from the project fa and the unops policy docs 
-    try:
-        system_prompt = """
+ANALYSIS_SYSTEM_PROMPT = """
             Use ReAct:
                 1. **Reason**: Identify relevant project elements from project document.
                 2. **Act**: Match to tool or indicators.
@@ -103,12 +70,10 @@ def answer_question_from_document_link(document_link: str) -> Dict[str, Any]:
                 4. **Act**: Format the response as JSON
                 If information is missing or uncertain, include null values.
         """
-        from python_backend.ai.models import llm
-        
-        # 1. Create a summary text 
-        try:
-            # Create prompt for the LLM
-            prompt = f"""
+
+def build_summary_prompt(project_doc_text: str) -> str:
+    """Prompt for the written project summary."""
+    return ANALYSIS_SYSTEM_PROMPT + f"""
             You are analyzing a project document financial document for Sustainable Development Goals (SDGs) impact and potential application of remote sensing.
             The project document contains two main sections in the report: <finance> and <project description>.
             Based on the document text below, please answer the following question:
@@ -124,22 +89,10 @@ def answer_question_from_document_link(document_link: str) -> Dict[str, Any]:
             
             Create a written summary of the project based on the questions and the document text.
             """
-            
-            # Get response from LLM
-            response = llm.complete(system_prompt + prompt)
-            answer_summary = response.text.strip()
-            
-            # Store in summary
-            print(answer_summary)
-            logger.info(f"Generated summary for doc")
-        except:
-            logger.info(f"Fail to generate summary")
-            answer_summary = None
-            
-        # 2. Create a sdg and sdg indicators json
-        try:
-            # Create prompt for the LLM
-            prompt = f"""
+
+def build_sdg_prompt(project_doc_text: str, sdg_context: str) -> str:
+    """Prompt for the SDG goals and indicators JSON."""
+    return ANALYSIS_SYSTEM_PROMPT + f"""
             You are analyzing a project document financial document for Sustainable Development Goals (SDGs) and measurable SDG indicators.
             You are given two sets of documents: 1. project document, 2. sdg indicators documents.
             The project document contains two main sections in the report: <finance> and <project description>.
@@ -152,45 +105,32 @@ def answer_question_from_document_link(document_link: str) -> Dict[str, Any]:
             {project_doc_text}
             
             *Here is the sdg indicators document*:
-            {policy_doc_list[0]}
-            {policy_doc_list[1]}
+            {sdg_context}
 
             *Strictly follow this nested json response format*
-            {
+            {{
                 "sdg_goals": [
-                    {
+                    {{
                         "sdg_goal": "string",  # e.g., "6"
                         "name": "string",     # e.g., "Clean Water and Sanitation"
                         "relevance": "string" # e.g., "Provides safe water"
-                    }, ...]
+                    }}, ...]
                 ,
                 "sdg_indicators": [
-                    {
+                    {{
                         "sdg_indicator": "string",    # e.g., "6.1.1"
                         "indicator_name": "string",  # e.g., "Proportion with safe water"
                         "unsd_indicator_codes": "string",  # e.g., "C060101"
                         "relevance": "string"        # e.g., "Measures household access"
-                    }, ...]
-            }
+                    }}, ...]
+            }}
             
             Only output the json string.
             """
-            # Get response from LLM
-            response = llm.complete(system_prompt+prompt)
-            answer_sdg = response.text.strip()
-            
-            # Store in summary
-            print(answer_sdg)
-            logger.info(f"Generated SDG for doc")
-            
-        except Exception as e:
-            logger.error(f"system_prompt + Error generating summary doc")
-            answer_sdg = None
-            
-        # 3. Create a imat and remote sensing capacity json
-        try:
-            # Create prompt for the LLM
-            prompt = f"""
+
+def build_remote_sensing_prompt(project_doc_text: str, remote_sensing_context: str) -> str:
+    """Prompt for the remote sensing tools JSON."""
+    return ANALYSIS_SYSTEM_PROMPT + f"""
             You are analyzing a project document financial document for potential application of remote sensing.
             You are given two sets of documents: 1. project document, 2. remote sensing tools documents.
             The project document contains two main sections in the report: <finance> and <project description>.
@@ -203,36 +143,307 @@ def answer_question_from_document_link(document_link: str) -> Dict[str, Any]:
             {project_doc_text}
             
             *Here are the remote sensing tools documents*:
-            {policy_doc_list[2]}
-            {policy_doc_list[3]}
-            {policy_doc_list[4]}
+            {remote_sensing_context}
             
             *Strictly follow this nested json response format*
-            {
+            {{
                 "remote_sensing_tools":[
-                    {
+                    {{
                         "technology": "string",   # e.g., "Remote Sensing Tool A"
                         "application": "string"   # e.g., "Monitor water sources"
-                    }
+                    }}
                 ]
-            }
+            }}
             Only output the json string.
             """
+
+def build_structured_prompt(project_doc_text: str, sdg_context: str, remote_sensing_context: str) -> str:
+    """Prompt for the single-call analysis; the output format comes from the response schema."""
+    return ANALYSIS_SYSTEM_PROMPT + f"""
+            You are analyzing a project document financial document for Sustainable Development Goals (SDGs) impact and potential application of remote sensing.
+            You are given three sets of documents: 1. project document, 2. sdg indicators documents, 3. remote sensing tools documents.
+            The project document contains two main sections in the report: <finance> and <project description>.
+            Based on the documents below, analyze:
+            - What are the main objectives of the project? Focus on the <project description>.
+            - What specific societal, economic, or environmental problems does it address? Focus on <project description>.
+            - Who are the beneficiaries and who will be impacted? Focus on <project description>.
+            - What are the anticipated short-term and long-term outcomes? Focus on <project description> and <finance>.
+            - Which outcomes are quantifiable?
+            - What SDG goals does this project contribute to, and which SDG indicators are measurable in this project?
+            - Which remote sensing or other IMAT tools are applicable for this project, and how? Quote the part of the
+              <project description> that justifies each tool.
+            Write a written summary of the project in "project_summary" and fill in every other field of the response schema.
             
-            # Get response from LLM
-            response = llm.complete(system_prompt+prompt)
-            answer_rs = response.text.strip()
+            *Here is the project document*:
+            {project_doc_text}
             
-            # Store in summary
-            print(answer_rs)
-            logger.info(f"Generated remote sensing summary for doc")
+            *Here is the sdg indicators document*:
+            {sdg_context}
             
+            *Here are the remote sensing tools documents*:
+            {remote_sensing_context}
+            """
+
+def parse_json_response(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a JSON object from an LLM response, tolerating markdown code fences.
+    
+    Args:
+        text: Raw response text.
+        
+    Returns:
+        The parsed object, or None if the text is empty or not valid JSON.
+    """
+    if not text:
+        return None
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else ""
+        cleaned = cleaned.rsplit("```", 1)[0]
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        logger.error(f"Could not parse JSON response: {str(e)}")
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+async def _complete_stage(stage: str, prompt: str, timeout: float) -> Optional[str]:
+    """Run one analysis LLM call with a timeout; failures return None."""
+    try:
+        response = await asyncio.wait_for(llm.acomplete(prompt), timeout=timeout)
+        logger.info(f"Generated {stage} for doc")
+        return response.text.strip()
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out generating {stage} after {timeout}s")
+    except Exception as e:
+        logger.error(f"Error generating {stage}: {str(e)}")
+    return None
+
+async def run_analysis_stages(prompts: Dict[str, str],
+                              timeouts: Dict[str, float] = None) -> Dict[str, Optional[str]]:
+    """
+    Issue the analysis LLM calls concurrently.
+    
+    Args:
+        prompts: Mapping of stage name to prompt.
+        timeouts: Per-stage timeouts in seconds (defaults to ANALYSIS_STAGE_TIMEOUTS).
+        
+    Returns:
+        Mapping of stage name to response text, None for stages that failed or timed out.
+    """
+    timeouts = timeouts or ANALYSIS_STAGE_TIMEOUTS
+    stages = list(prompts)
+    responses = await asyncio.gather(*(
+        _complete_stage(stage, prompts[stage], timeouts.get(stage, ANALYSIS_DEFAULT_TIMEOUT))
+        for stage in stages
+    ))
+    return dict(zip(stages, responses))
+
+_analysis_loop = None
+_analysis_loop_lock = threading.Lock()
+
+def get_analysis_loop() -> asyncio.AbstractEventLoop:
+    """The event loop analysis coroutines run on, in a daemon thread started on first use."""
+    global _analysis_loop
+    with _analysis_loop_lock:
+        if _analysis_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="analysis-event-loop", daemon=True).start()
+            _analysis_loop = loop
+    return _analysis_loop
+
+def run_coroutine(coroutine):
+    """
+    Run a coroutine on the shared analysis event loop and wait for its result.
+    
+    The LLM singletons keep async HTTP connections bound to the loop that
+    opened them, so every call goes through one long-lived loop rather than
+    a fresh asyncio.run per document; concurrent threads (the batch
+    analysis workers) share it. Callable from synchronous code and from
+    inside another running loop, but not from the analysis loop itself.
+    """
+    loop = get_analysis_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_coroutine called from the analysis event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+def analyzed_at() -> str:
+    """Timestamp of an analysis row: ranks re-analyses of a document, newest first."""
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+def merge_analysis_outputs(document_link: str, outputs: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Combine the stage responses into one analysis row.
+    
+    Args:
+        document_link: The link to the analyzed project document.
+        outputs: Stage responses from run_analysis_stages.
+        
+    Returns:
+        Dict with the file id, the analysis time, the summary and the parsed SDG and remote sensing fields.
+        Fields of failed stages are left out.
+    """
+    analysis = {"file_id": document_link, "analyzed_at": analyzed_at()}
+    if outputs.get("summary"):
+        analysis["project_summary"] = outputs["summary"]
+    for stage in ("sdg", "remote_sensing"):
+        parsed = parse_json_response(outputs.get(stage))
+        if parsed:
+            analysis.update(parsed)
+    return analysis
+
+def get_policy_contexts(policy_doc_list: List[str], query_text: str,
+                        context_mode: str = None) -> Tuple[str, str]:
+    """
+    Build the SDG and remote sensing policy context for the prompts.
+    
+    Args:
+        policy_doc_list: Policy texts as returned by create_policy_docs.
+        query_text: Text describing the project (its summary), used in retrieval mode.
+        context_mode: "full" or "retrieval" (defaults to POLICY_CONTEXT_MODE).
+        
+    Returns:
+        Tuple of (sdg_context, remote_sensing_context).
+    """
+    context_mode = context_mode or POLICY_CONTEXT_MODE
+    if context_mode == "retrieval":
+        return (
+            policy_context_index.retrieve(query_text, "sdg"),
+            policy_context_index.retrieve(query_text, "remote_sensing"),
+        )
+    if context_mode != "full":
+        raise ValueError(f"Unknown policy context mode: {context_mode}")
+    return (
+        "\n".join(policy_doc_list[:SDG_POLICY_DOC_COUNT]),
+        "\n".join(policy_doc_list[SDG_POLICY_DOC_COUNT:]),
+    )
+
+def analyze_document_text_structured(document_link: str, project_doc_text: str,
+                                    policy_doc_list: List[str]) -> Dict[str, Any]:
+    """
+    Analyze a project document with a single schema-constrained LLM call.
+    
+    The project text is sent once instead of three times. The response
+    schema is derived from the BigQuery analysis results schema, so the
+    output can be uploaded as is.
+    
+    Args:
+        document_link: The link to the project document.
+        project_doc_text: The parsed project document text.
+        policy_doc_list: Policy texts as returned by create_policy_docs.
+        
+    Returns:
+        Dict containing the structured analysis (only the file id if the call failed).
+    """
+    # No summary exists yet in this mode; retrieval matches on the start of the document
+    sdg_context, remote_sensing_context = get_policy_contexts(
+        policy_doc_list, project_doc_text[:RETRIEVAL_QUERY_CHARS]
+    )
+    prompt = build_structured_prompt(project_doc_text, sdg_context, remote_sensing_context)
+    structured_llm = get_structured_llm(schema_to_response_schema())
+    timeout = ANALYSIS_STAGE_TIMEOUTS.get("structured", ANALYSIS_DEFAULT_TIMEOUT)
+    
+    async def complete() -> Optional[str]:
+        try:
+            response = await asyncio.wait_for(structured_llm.acomplete(prompt), timeout=timeout)
+            logger.info("Generated structured analysis for doc")
+            return response.text
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out generating structured analysis after {timeout}s")
         except Exception as e:
-            logger.error(f"Error generating summary doc")
-            answer_rs = None
+            logger.error(f"Error generating structured analysis: {str(e)}")
+        return None
+    
+    analysis = parse_json_response(run_coroutine(complete())) or {}
+    analysis["file_id"] = document_link
+    analysis["analyzed_at"] = analyzed_at()
+    return analysis
+
+def analyze_document_text(document_link: str, project_doc_text: str, policy_doc_list: List[str],
+                          mode: str = None) -> Dict[str, Any]:
+    """
+    Analyze a project document against the policy documents.
+    
+    In "multi" mode the summary, SDG and remote sensing calls are
+    independent and run concurrently, so the latency is that of the slowest
+    call. A failed or timed out stage does not discard the others. With
+    retrieval-based policy context the summary runs first, because it is
+    the retrieval query. In "single" mode one schema-constrained call
+    returns every field.
+    
+    Args:
+        document_link: The link to the project document.
+        project_doc_text: The parsed project document text.
+        policy_doc_list: Policy texts as returned by create_policy_docs.
+        mode: "multi" or "single" (defaults to ANALYSIS_MODE).
         
-        return {**answer_summary, **answer_sdg, **answer_rs}
+    Returns:
+        Dict containing the structured analysis.
+    """
+    mode = mode or ANALYSIS_MODE
+    if mode == "single":
+        return analyze_document_text_structured(document_link, project_doc_text, policy_doc_list)
+    if mode != "multi":
+        raise ValueError(f"Unknown analysis mode: {mode}")
+    
+    if POLICY_CONTEXT_MODE == "retrieval":
+        # The summary is the retrieval query, so it has to come first
+        outputs = run_coroutine(run_analysis_stages({"summary": build_summary_prompt(project_doc_text)}))
+        sdg_context, remote_sensing_context = get_policy_contexts(
+            policy_doc_list, outputs["summary"] or project_doc_text[:RETRIEVAL_QUERY_CHARS]
+        )
+        outputs.update(run_coroutine(run_analysis_stages({
+            "sdg": build_sdg_prompt(project_doc_text, sdg_context),
+            "remote_sensing": build_remote_sensing_prompt(project_doc_text, remote_sensing_context),
+        })))
+    else:
+        sdg_context, remote_sensing_context = get_policy_contexts(policy_doc_list, "")
+        outputs = run_coroutine(run_analysis_stages({
+            "summary": build_summary_prompt(project_doc_text),
+            "sdg": build_sdg_prompt(project_doc_text, sdg_context),
+            "remote_sensing": build_remote_sensing_prompt(project_doc_text, remote_sensing_context),
+        }))
+    failed = [stage for stage, output in outputs.items() if output is None]
+    if failed:
+        logger.warning(f"Analysis stages failed for {document_link}: {failed}")
+    return merge_analysis_outputs(document_link, outputs)
+
+def answer_question_from_document_link(document_link: str) -> Dict[str, Any]:
+    """
+    Answer a question based on a document link and policy indices.
+    First extracts information from policy documents, then uses that to analyze the project document.
+    
+    Args:
+        document_link: The link to the project document to analyze.
+                
+    Returns:
+        Dict containing the structured analysis and relevant context.
+    """
+    logger.info(f"Processing document link: {document_link}")
+    
+    # Step 1: load policy context docs
+    try:
+        policy_doc_list = create_policy_docs()
+        logger.info(f"Initialized {len(policy_doc_list)} policy document")
+    except Exception as e:
+        logger.error(f"Error initializing policy docments: {str(e)}")
+        return {}
 
+    # Step 2: Download and analyze the project document 
+    try:
+        processed_doc = process_document(document_link) 
+        project_doc_text = processed_doc['text_doc_fa'] 
+    except Exception as e:
+        logger.error(f"Error initializing project fa doc: {str(e)}")
+        return {}
+    
+    # Step 3: Extract data from the project fa and the unops policy docs 
+    try:
+        return analyze_document_text(document_link, project_doc_text, policy_doc_list)
     except Exception as e:
         logger.error(f"Error processing document: {str(e)}")
         return {"answer": f"Error processing document: {str(e)}", "source_links": [document_link]}
@@ -1,9 +1,21 @@
 from ast import main
 import os
+import json
+import time
+import atexit
+import threading
+from datetime import datetime, timezone
 from google.cloud import bigquery
+from google.api_core.exceptions import BadRequest
 
 from python_backend.auth.credentials import credentials_manager
 from python_backend.config import logger, GCP_PROJECT_ID, BQ_FA_DATASET, BQ_FA_TABLE, BQ_MIT_DATASET, BQ_MIT_TABLE, GCP_LOCATION
+from python_backend.config import BQ_AGGREGATES_TABLE
+from python_backend.config import RESULT_WRITER_MAX_ROWS, RESULT_WRITER_FLUSH_INTERVAL
+from python_backend.config import (
+    RESULT_WRITER_MAX_BACKOFF, RESULT_WRITER_MAX_BUFFERED_ROWS, RESULT_WRITER_MAX_SINGLE_ROW_LOADS,
+    RESULT_WRITER_DEAD_LETTER_PATH
+)
 # BQ_REPORTS_RESULT
 
 _bigquery_client = None
@@ -59,8 +71,55 @@ schema = [
             bigquery.SchemaField("project_description_context", "STRING", mode="NULLABLE", description="Exact section/paragraph/page/sentence(s) from the project description that justify the tool's inclusion, including a direct quote and its location"),
         ],
     ),
+    bigquery.SchemaField("analyzed_at", "TIMESTAMP", mode="NULLABLE", description="When the analysis was produced"),
 ]
 
+# Stamped on analysis rows; picks the latest analysis of a document analyzed more than once
+ANALYZED_AT_COLUMN = "analyzed_at"
+
+
+def schema_to_response_schema(fields=None, exclude=("file_id", ANALYZED_AT_COLUMN)):
+    """
+    Convert BigQuery schema fields into a Gemini JSON response schema.
+    
+    Args:
+        fields: List of bigquery.SchemaField (defaults to the analysis results schema).
+        exclude: Top-level field names to leave out (e.g. fields filled in by the pipeline).
+        
+    Returns:
+        Dict in the OpenAPI subset accepted as a Gemini response_schema.
+    """
+    type_map = {
+        "STRING": "STRING",
+        "INTEGER": "INTEGER",
+        "INT64": "INTEGER",
+        "FLOAT": "NUMBER",
+        "FLOAT64": "NUMBER",
+        "NUMERIC": "NUMBER",
+        "BOOLEAN": "BOOLEAN",
+        "BOOL": "BOOLEAN",
+    }
+
+    def convert(field):
+        if field.field_type in ("RECORD", "STRUCT"):
+            field_schema = schema_to_response_schema(field.fields, exclude=())
+        else:
+            field_schema = {"type": type_map.get(field.field_type, "STRING")}
+        if field.description:
+            field_schema["description"] = field.description
+        if field.mode == "REPEATED":
+            return {"type": "ARRAY", "items": field_schema}
+        if field.mode == "NULLABLE":
+            field_schema["nullable"] = True
+        return field_schema
+
+    fields = schema if fields is None else fields
+    properties = {field.name: convert(field) for field in fields if field.name not in exclude}
+    return {
+        "type": "OBJECT",
+        "properties": properties,
+        "required": list(properties),
+    }
 
 def get_bigquery_client(location=GCP_LOCATION):
     """Get authenticated BigQuery client."""
@@ -136,91 +195,124 @@ def ensure_processed_docs_table_exists():
         logger.error(f"Error creating processed documents table: {str(e)}")
         return False
 
-def is_document_already_processed(file_link, engagement_code = None):
+def get_processed_documents(file_links, chunk_size=10000):
     """
-    Check if a document has already been processed and indexed.
+    Find which of the given documents have already been processed successfully.
+    
+    Runs one parameterized query per chunk of links (an array parameter
+    with UNNEST) instead of one query per link.
     
     Args:
-        file_link (str): File link (Google Drive URL or GCS URI)
-        engagement_code: Engagement code of the project
+        file_links (list): File links (Google Drive URLs or GCS URIs)
+        chunk_size (int): Maximum number of links sent in one query
         
     Returns:
-        bool: True if the document has already been processed successfully, False otherwise
+        set: The links that have a successful processing record
     """
+    file_links = list(dict.fromkeys(file_links))
+    if not file_links:
+        return set()
     try:
         bigquery_client = get_bigquery_client()
         if not bigquery_client or not ensure_processed_docs_table_exists():
             logger.warning("BigQuery client or processed documents table not initialized")
-            return False
-            
-        # Build query conditions
-        conditions = [f"file_link = '{file_link}'"]
-        # If there are more identifying fields
-        # if engagement_code:
-        #     conditions.append(f"engagement_code = '{engagement_code}'")
-        conditions.append("status = 'success'")
-        
-        where_clause = " AND ".join(conditions)
+            return set()
         
         query = f"""
-        SELECT COUNT(*) as count
+        SELECT DISTINCT file_link
         FROM `{GCP_PROJECT_ID}.{BQ_MIT_DATASET}.processed_documents`
-        WHERE {where_clause}
+        WHERE status = 'success'
+          AND file_link IN UNNEST(@file_links)
         """
-        query_job = bigquery_client.query(query)
-        results = query_job.result()
+        processed = set()
+        for i in range(0, len(file_links), chunk_size):
+            job_config = bigquery.QueryJobConfig(query_parameters=[
+                bigquery.ArrayQueryParameter("file_links", "STRING", file_links[i:i + chunk_size])
+            ])
+            results = bigquery_client.query(query, job_config=job_config).result()
+            processed.update(row.file_link for row in results)
         
-        # Get the count from the results
-        for row in results:
-            return row.count > 0
-            
-        return False
+        logger.info(f"{len(processed)} of {len(file_links)} documents already processed")
+        return processed
     except Exception as e:
-        logger.error(f"Error checking if document is already processed: {str(e)}")
-        return False
+        logger.error(f"Error checking processed documents: {str(e)}")
+        return set()
 
-def mark_document_as_processed(file_link, status="success", error_message=None):
+def is_document_already_processed(file_link, engagement_code = None):
     """
-    Record a document as processed in the tracking table.
+    Check if a document has already been processed and indexed.
     
     Args:
         file_link (str): File link (Google Drive URL or GCS URI)
+        engagement_code: Engagement code of the project
+        
+    Returns:
+        bool: True if the document has already been processed successfully, False otherwise
+    """
+    # If there are more identifying fields (e.g. engagement_code), add them to get_processed_documents
+    return file_link in get_processed_documents([file_link])
+
+def mark_documents_as_processed(file_links, status="success", error_message=None):
+    """
+    Record several documents as processed in the tracking table with one insert.
+    
+    Args:
+        file_links (list): File links (Google Drive URLs or GCS URIs)
         status (str): Processing status - "success" or "failed"
         error_message (str, optional): Error message if processing failed
         
     Returns:
         bool: True if recording was successful, False otherwise
     """
+    if not file_links:
+        return True
     try:
         bigquery_client = get_bigquery_client()
         if not bigquery_client or not ensure_processed_docs_table_exists():
             logger.warning("BigQuery client or processed documents table not initialized")
             return False
             
-        # Create a row to insert
+        # Create the rows to insert
         from datetime import datetime
-        row = {
-            "file_link": file_link,
-            "status": status,
-            "processed_at": datetime.now().isoformat()
-        }
-        
-        if error_message:
-            row["error_message"] = error_message
+        processed_at = datetime.now().isoformat()
+        rows = []
+        for file_link in file_links:
+            row = {
+                "file_link": file_link,
+                "status": status,
+                "processed_at": processed_at
+            }
+            if error_message:
+                row["error_message"] = error_message
+            rows.append(row)
             
-        # Insert the row into the table
+        # Insert the rows into the table
         table_id = f"{GCP_PROJECT_ID}.{BQ_MIT_DATASET}.processed_documents"
-        errors = bigquery_client.insert_rows_json(table_id, [row])
+        errors = bigquery_client.insert_rows_json(table_id, rows)
         
         if errors:
-            logger.error(f"Error inserting row into processed documents table: {errors}")
+            logger.error(f"Error inserting rows into processed documents table: {errors}")
             return False
             
         return True
     except Exception as e:
-        logger.error(f"Error marking document as processed: {str(e)}")
+        logger.error(f"Error marking documents as processed: {str(e)}")
         return False
 
+def mark_document_as_processed(file_link, status="success", error_message=None):
+    """
+    Record a document as processed in the tracking table.
+    
+    Args:
+        file_link (str): File link (Google Drive URL or GCS URI)
+        status (str): Processing status - "success" or "failed"
+        error_message (str, optional): Error message if processing failed
+        
+    Returns:
+        bool: True if recording was successful, False otherwise
+    """
+    return mark_documents_as_processed([file_link], status=status, error_message=error_message)
+
 def get_fa_from_bigquery(number_entries=10):
     """
     Retrieve document links from BigQuery.
@@ -265,42 +357,323 @@ def get_fa_from_bigquery(number_entries=10):
         logger.error(f"Error retrieving document links from BigQuery: {str(e)}")
         return []
 
-# Update Table with New Row
-def upload_to_bigquery(row: dict, project_id = GCP_PROJECT_ID, dataset_id = BQ_MIT_DATASET, table_id = BQ_MIT_TABLE) -> None:
+def load_rows_to_bigquery(rows: list, project_id = GCP_PROJECT_ID, dataset_id = BQ_MIT_DATASET, table_id = BQ_MIT_TABLE) -> bool:
     """
-    Upload a single row to a BigQuery table with Repeated Fields.
+    Append analysis rows to a BigQuery table in one load job, without
+    recording their documents as processed.
     Args:
-        row: Dict[str, Any], processed row from json document analysis results to upload,
+        rows: List[Dict[str, Any]], analysis result rows matching the results schema
         project_id: str, GCP project id, 
         dataset_id: str, GCS dataset id, 
         table_id: str, GCS table id
 
     Returns:
+        bool: True if the rows were loaded, False if BigQuery is not available
+
+    Raises:
+        Exception: If the load job fails (e.g. a row does not match the schema)
     """
+    if not rows:
+        return True
 
     bigquery_client = get_bigquery_client()
     if not bigquery_client or not ensure_processed_docs_table_exists():
         logger.warning("BigQuery client or processed documents table not initialized")
         return False
-            
-    table_ref = f"{project_id}.{dataset_id}.{table_id}"
 
+    table_ref = f"{project_id}.{dataset_id}.{table_id}"
     job_config = bigquery.LoadJobConfig(
         schema=schema,
-        write_disposition="WRITE_APPEND"
+        write_disposition="WRITE_APPEND",
+        # Tables created before a column was added to the schema gain it on the next load
+        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
     )
-    file_link = row.get("file_id")  # or any other field that identifies the document source
-    try:
-        job = bigquery_client.load_table_from_json([row], table_ref, job_config=job_config)
-        job.result()
-        logger.info(f"Uploaded row for {file_link} to {table_ref}")
-        if file_link:
-            mark_document_as_processed(file_link, status="success")
-        return True
+    job = bigquery_client.load_table_from_json(rows, table_ref, job_config=job_config)
+    job.result()
+    logger.info(f"Uploaded {len(rows)} rows to {table_ref}")
+    return True
 
+# Update Table with New Rows
+def upload_rows_to_bigquery(rows: list, project_id = GCP_PROJECT_ID, dataset_id = BQ_MIT_DATASET, table_id = BQ_MIT_TABLE) -> bool:
+    """
+    Upload analysis rows to a BigQuery table with Repeated Fields in one load job,
+    then record their documents as processed.
+    Args:
+        rows: List[Dict[str, Any]], processed rows from json document analysis results to upload,
+        project_id: str, GCP project id, 
+        dataset_id: str, GCS dataset id, 
+        table_id: str, GCS table id
+
+    Returns:
+        bool: True if the rows were uploaded, False if BigQuery is not available
+    """
+    # or any other field that identifies the document source
+    file_links = [row.get("file_id") for row in rows if row.get("file_id")]
+    try:
+        if not load_rows_to_bigquery(rows, project_id=project_id, dataset_id=dataset_id, table_id=table_id):
+            return False
     except Exception as e:
         logger.error(f"Error uploading to BigQuery: {str(e)}")
         raise
+    # Only once the load succeeded; the rows are in the table even if this fails
+    if not mark_documents_as_processed(file_links, status="success"):
+        logger.error(f"Uploaded {len(rows)} rows but could not record their documents as processed")
+    return True
+
+def upload_to_bigquery(row: dict, project_id = GCP_PROJECT_ID, dataset_id = BQ_MIT_DATASET, table_id = BQ_MIT_TABLE) -> bool:
+    """
+    Upload a single row to a BigQuery table with Repeated Fields.
+    For batches, prefer ResultWriter, which groups rows into one load job.
+    Args:
+        row: Dict[str, Any], processed row from json document analysis results to upload,
+        project_id: str, GCP project id, 
+        dataset_id: str, GCS dataset id, 
+        table_id: str, GCS table id
+
+    Returns:
+        bool: True if the row was uploaded, False if BigQuery is not available
+    """
+    return upload_rows_to_bigquery([row], project_id=project_id, dataset_id=dataset_id, table_id=table_id)
+
+class ResultWriter:
+    """
+    Buffered writer for analysis results.
+    
+    Rows are collected and written as one load job when `max_rows` rows are
+    buffered or `flush_interval` seconds have passed since the first
+    buffered row, which keeps large batches within BigQuery's per-table
+    load job quotas. Once a load succeeds, the rows' documents are recorded
+    as processed (retried on later flushes if that insert fails). Pending
+    rows are flushed on interpreter shutdown.
+    
+    A load that fails on BigQuery's side (outage, quota, client not
+    initialized) keeps its rows buffered and is retried with exponential
+    backoff up to `max_backoff` seconds; while more than
+    `max_buffered_rows` rows are waiting, `add` blocks until the next
+    attempt, which holds back the batch pipeline instead of growing the
+    buffer. Only a load rejected for its rows (BadRequest, e.g. a row that
+    does not match the schema) is split into single-row loads, at most
+    `max_single_row_loads` per flush, so one bad row cannot block the
+    others; rows that still fail are appended to the dead-letter file with
+    their error and their documents are recorded as failed.
+    """
+
+    def __init__(self, max_rows=RESULT_WRITER_MAX_ROWS, flush_interval=RESULT_WRITER_FLUSH_INTERVAL,
+                 project_id=GCP_PROJECT_ID, dataset_id=BQ_MIT_DATASET, table_id=BQ_MIT_TABLE,
+                 max_backoff=RESULT_WRITER_MAX_BACKOFF, max_buffered_rows=RESULT_WRITER_MAX_BUFFERED_ROWS,
+                 max_single_row_loads=RESULT_WRITER_MAX_SINGLE_ROW_LOADS,
+                 dead_letter_path=RESULT_WRITER_DEAD_LETTER_PATH):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+        self.max_backoff = max_backoff
+        self.max_buffered_rows = max(max_buffered_rows, max_rows)
+        self.max_single_row_loads = max_single_row_loads
+        self.dead_letter_path = dead_letter_path
+        self._rows = []
+        self._first_row_at = None
+        self._failed_flushes = 0
+        # No load is attempted before this time (time.monotonic) unless forced
+        self._retry_at = 0.0
+        # Documents whose rows were loaded but not yet recorded as processed
+        self._unmarked_links = []
+        self._flush_callbacks = []
+        self._lock = threading.Lock()
+        # Notified after every load attempt, for adds waiting on a full buffer
+        self._attempted = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, name="result-writer", daemon=True)
+        self._timer.start()
+        atexit.register(self.close)
+
+    def add(self, row):
+        """
+        Buffer one analysis row, flushing if the buffer is full.
+        
+        Blocks until the next load attempt while `max_buffered_rows` rows
+        are waiting for BigQuery.
+        
+        Args:
+            row: Dict[str, Any], analysis result row matching the results schema
+        """
+        with self._lock:
+            if len(self._rows) >= self.max_buffered_rows and not self._closed.is_set():
+                logger.warning(f"{len(self._rows)} analysis rows waiting for BigQuery, "
+                               f"holding new rows until the next load attempt")
+                self._attempted.wait(timeout=self.max_backoff)
+            if not self._rows:
+                self._first_row_at = time.monotonic()
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_rows
+        if full:
+            self.flush()
+
+    def add_flush_callback(self, callback):
+        """
+        Call `callback(written, dead_lettered)` after each flush that settled rows.
+        
+        Args:
+            callback: Callable taking the list of loaded rows and the list of
+                rows given up on and written to the dead-letter file
+        """
+        with self._lock:
+            self._flush_callbacks.append(callback)
+
+    def remove_flush_callback(self, callback):
+        with self._lock:
+            if callback in self._flush_callbacks:
+                self._flush_callbacks.remove(callback)
+
+    def flush(self, force=False):
+        """
+        Write all buffered rows as one load job.
+        
+        Args:
+            force: Attempt the load even while backing off after a failure
+        
+        Returns:
+            bool: True if every buffered row was loaded (or the buffer was empty),
+                False if rows are still buffered or were dead-lettered
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not force and time.monotonic() < self._retry_at:
+                    return not self._rows
+                rows, self._rows = self._rows, []
+                self._first_row_at = None
+            try:
+                self._mark_loaded([])
+                if not rows:
+                    return True
+                try:
+                    if load_rows_to_bigquery(rows, project_id=self.project_id,
+                                             dataset_id=self.dataset_id, table_id=self.table_id):
+                        self._failed_flushes = 0
+                        self._retry_at = 0.0
+                        self._mark_loaded(rows)
+                        self._notify_flushed(rows, [])
+                        return True
+                    error = "BigQuery client not initialized"
+                except BadRequest as e:
+                    logger.error(f"BigQuery rejected {len(rows)} analysis rows, loading them one by one: {str(e)}")
+                    self._flush_row_by_row(rows)
+                    return False
+                except Exception as e:
+                    error = str(e)
+                self._back_off(rows, error)
+                return False
+            finally:
+                with self._lock:
+                    self._attempted.notify_all()
+
+    def _back_off(self, rows, error):
+        """Put rows back in front of the buffer and delay the next load attempt."""
+        self._failed_flushes += 1
+        delay = min(self.flush_interval * 2 ** (self._failed_flushes - 1), self.max_backoff)
+        logger.error(f"Error flushing {len(rows)} analysis rows (attempt {self._failed_flushes}), "
+                     f"retrying in {delay:.0f}s: {error}")
+        with self._lock:
+            self._rows = rows + self._rows
+            self._first_row_at = time.monotonic()
+            self._retry_at = time.monotonic() + delay
+
+    def _flush_row_by_row(self, rows):
+        """
+        Load rows one at a time and dead-letter the ones BigQuery rejects.
+        
+        Rows past `max_single_row_loads`, or after a failure that is not
+        about the row, go back to the buffer.
+        """
+        written, dead_lettered = [], []
+        for index, row in enumerate(rows[:self.max_single_row_loads]):
+            try:
+                if load_rows_to_bigquery([row], project_id=self.project_id,
+                                         dataset_id=self.dataset_id, table_id=self.table_id):
+                    written.append(row)
+                    continue
+                self._back_off(rows[index:], "BigQuery client not initialized")
+                break
+            except BadRequest as e:
+                self._dead_letter(row, str(e))
+                dead_lettered.append(row)
+            except Exception as e:
+                self._back_off(rows[index:], str(e))
+                break
+        else:
+            if len(rows) > self.max_single_row_loads:
+                # Loaded as a batch again on the next flush; split further if still rejected
+                with self._lock:
+                    self._rows = rows[self.max_single_row_loads:] + self._rows
+                    self._first_row_at = time.monotonic()
+        logger.error(f"Loaded {len(written)} analysis rows one by one, "
+                     f"{len(dead_lettered)} written to {self.dead_letter_path}")
+        self._mark_loaded(written)
+        failed_links = [row["file_id"] for row in dead_lettered if row.get("file_id")]
+        if failed_links and not mark_documents_as_processed(
+                failed_links, status="failed", error_message="Analysis row could not be loaded into BigQuery"):
+            logger.error(f"Could not record {len(failed_links)} dead-lettered documents as failed")
+        self._notify_flushed(written, dead_lettered)
+
+    def _dead_letter(self, row, error):
+        """Append a row that could not be loaded to the dead-letter file."""
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            record = {"table": f"{self.project_id}.{self.dataset_id}.{self.table_id}", "error": error,
+                      "failed_at": datetime.now(timezone.utc).isoformat(), "row": row}
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except Exception as e:
+            logger.error(f"Could not dead-letter analysis row {row.get('file_id')}: {str(e)} ({error})")
+
+    def _mark_loaded(self, rows):
+        """Record the documents of loaded rows as processed, with any earlier ones still unrecorded."""
+        links = self._unmarked_links + [row["file_id"] for row in rows if row.get("file_id")]
+        if not links:
+            return
+        if mark_documents_as_processed(links, status="success"):
+            self._unmarked_links = []
+            return
+        # Retried on the next flush. Never dropped: a loaded document that is
+        # not recorded would be analyzed and loaded again by the next batch.
+        logger.error(f"Could not record {len(links)} loaded documents as processed, will retry")
+        self._unmarked_links = links
+
+    def _notify_flushed(self, written, dead_lettered):
+        with self._lock:
+            callbacks = list(self._flush_callbacks)
+        for callback in callbacks:
+            try:
+                callback(written, dead_lettered)
+            except Exception as e:
+                logger.error(f"Error in result writer flush callback: {str(e)}")
+
+    def _flush_periodically(self):
+        """Background loop that flushes rows older than flush_interval."""
+        while not self._closed.wait(min(self.flush_interval, 1.0)):
+            with self._lock:
+                due = self._first_row_at is not None and \
+                    time.monotonic() - self._first_row_at >= self.flush_interval
+            if due:
+                self.flush()
+
+    def close(self):
+        """Stop the background flush and write any remaining rows."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.flush(force=True)
+
+_result_writer = None
+
+def get_result_writer():
+    """Get the shared ResultWriter for the analysis results table."""
+    global _result_writer
+    if _result_writer is None:
+        _result_writer = ResultWriter()
+    return _result_writer
  
 # The big query table that stores analysis result
 def create_bigquery_table(project_id = GCP_PROJECT_ID, dataset_id = BQ_MIT_DATASET, table_id = BQ_MIT_TABLE) -> None:
@@ -328,6 +701,131 @@ def create_bigquery_table(project_id = GCP_PROJECT_ID, dataset_id = BQ_MIT_DATAS
         print(f"Created table {table.project}.{table.dataset_id}.{table.table_id}")
     except Exception as e:
         print(f"Error creating table: {e}")
+
+
+_table_columns = {}
+
+def get_table_columns(table_ref: str) -> set:
+    """
+    Column names of a table or view, read once per process.
+    
+    Returns:
+        set: The column names (empty if the table cannot be read; not cached then)
+    """
+    if table_ref not in _table_columns:
+        bigquery_client = get_bigquery_client()
+        if not bigquery_client:
+            return set()
+        try:
+            _table_columns[table_ref] = {field.name for field in bigquery_client.get_table(table_ref).schema}
+        except Exception as e:
+            logger.warning(f"Could not read the schema of {table_ref}: {str(e)}")
+            return set()
+    return _table_columns[table_ref]
+
+def latest_analyses_query(table_ref: str, where: str = "TRUE") -> str:
+    """
+    SELECT of the latest analysis of each file_id in a results table.
+    
+    A document analyzed more than once has one row per analysis. Rows are
+    ranked by analyzed_at, newest first, if the table has that column; rows
+    without it (written before it was added) rank last. Remaining ties are
+    broken by a fingerprint of project_summary, so every query picks the
+    same row.
+    
+    Args:
+        table_ref: Fully qualified table or view id, aliased `results`
+        where: Condition applied before the dedupe (only on file_id, or it changes which row is latest)
+        
+    Returns:
+        str: SQL selecting results.* with one row per file_id
+    """
+    order = "FARM_FINGERPRINT(IFNULL(results.project_summary, ''))"
+    if ANALYZED_AT_COLUMN in get_table_columns(table_ref):
+        order = f"results.{ANALYZED_AT_COLUMN} DESC, {order}"
+    return (f"SELECT results.* FROM `{table_ref}` AS results WHERE {where} "
+            f"QUALIFY ROW_NUMBER() OVER (PARTITION BY results.file_id ORDER BY {order}) = 1")
+
+# Dimension name -> (FROM clause over final_results_engagement, value expression)
+AGGREGATE_DIMENSIONS = {
+    "sdg_goal": ("UNNEST(sdg_goals) AS goal", "goal.sdg_goal"),
+    "region": ("", "Region"),
+    "hub": ("", "Hub"),
+    "donor": ("", "Donor_Description"),
+    "tool": ("UNNEST(remote_sensing_tools) AS tool", "tool.technology"),
+}
+
+def build_dashboard_aggregates_query(project_id=GCP_PROJECT_ID, dataset_id=BQ_MIT_DATASET) -> str:
+    """
+    SQL computing the dashboard counts over final_results_engagement.
+    
+    Each row is (dimension, value, project_count); the "total" dimension
+    holds the number of projects. Only the latest analysis of each project
+    is counted (see latest_analyses_query), like /api/projects serves it.
+    The same SQL can be used as a BigQuery scheduled query writing to the
+    aggregates table.
+    """
+    source = "latest"
+    selects = [f"SELECT 'total' AS dimension, '' AS value, COUNT(DISTINCT file_id) AS project_count FROM {source}"]
+    for dimension, (unnest, value) in AGGREGATE_DIMENSIONS.items():
+        from_clause = f"{source}, {unnest}" if unnest else source
+        selects.append(
+            f"SELECT '{dimension}' AS dimension, {value} AS value, COUNT(DISTINCT file_id) AS project_count "
+            f"FROM {from_clause} WHERE {value} IS NOT NULL GROUP BY value"
+        )
+    latest = latest_analyses_query(f"{project_id}.{dataset_id}.final_results_engagement")
+    return f"WITH latest AS ({latest})\n" + "\nUNION ALL\n".join(selects)
+
+def refresh_dashboard_aggregates(project_id=GCP_PROJECT_ID, dataset_id=BQ_MIT_DATASET, table_id=BQ_AGGREGATES_TABLE) -> bool:
+    """
+    Rebuild the materialized dashboard aggregates table.
+    
+    Meant to run on a schedule (cron, Cloud Scheduler) or after a batch of
+    results is written, so the API reads a few hundred rows instead of
+    scanning final_results_engagement.
+    
+    Returns:
+        bool: True if the table was rebuilt, False otherwise
+    """
+    try:
+        bigquery_client = get_bigquery_client()
+        if not bigquery_client:
+            logger.error("BigQuery client not initialized")
+            return False
+        
+        query = f"""
+        CREATE OR REPLACE TABLE `{project_id}.{dataset_id}.{table_id}` AS
+        SELECT dimension, value, project_count, CURRENT_TIMESTAMP() AS computed_at
+        FROM (
+        {build_dashboard_aggregates_query(project_id, dataset_id)}
+        )
+        """
+        bigquery_client.query(query).result()
+        logger.info(f"Refreshed dashboard aggregates in {project_id}.{dataset_id}.{table_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard aggregates: {str(e)}")
+        return False
+
+def get_dashboard_aggregates(project_id=GCP_PROJECT_ID, dataset_id=BQ_MIT_DATASET, table_id=BQ_AGGREGATES_TABLE):
+    """
+    Read the materialized dashboard aggregates.
+    
+    Returns:
+        List of (dimension, value, project_count, computed_at) row dicts
+        
+    Raises:
+        Exception: If the table cannot be read (e.g. it was never materialized)
+    """
+    bigquery_client = get_bigquery_client()
+    if not bigquery_client:
+        raise RuntimeError("BigQuery client not initialized")
+    query = f"SELECT dimension, value, project_count, computed_at FROM `{project_id}.{dataset_id}.{table_id}`"
+    return [dict(row.items()) for row in bigquery_client.query(query).result()]
         
 if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["aggregates"]:
+        # e.g. scheduled: python -m python_backend.storage.bigquery aggregates
+        sys.exit(0 if refresh_dashboard_aggregates() else 1)
     create_bigquery_table()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import os
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import time
+from typing import Optional, Dict
+
+from ..config import logger, DOWNLOAD_CACHE_DIR, DOWNLOAD_CACHE_MAX_BYTES, DOWNLOAD_CACHE_ENABLED
+
+
+class DownloadCache:
+    """
+    Persistent, size-bounded cache of downloaded documents.
+
+    Entries are keyed by a version-aware key (Drive file id + checksum, GCS
+    generation, HTTP URL + ETag) and evicted least-recently-used first once
+    the cache grows past `max_bytes`. Cached files are never handed out
+    directly: callers get a fresh temp path (hard link or copy) that they
+    may delete as before.
+    """
+
+    def __init__(self, cache_dir: str = DOWNLOAD_CACHE_DIR, max_bytes: int = DOWNLOAD_CACHE_MAX_BYTES,
+                 enabled: bool = DOWNLOAD_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache index, creating it on first use."""
+        conn = sqlite3.connect(os.path.join(self.cache_dir, "index.db"), timeout=30)
+        if not self._initialized:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _entry_path(self, key: str, suffix: str) -> str:
+        """Content-addressed location of a cache entry."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + suffix)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Return the stored entry for a key without touching its access time.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            Dict with "path", "size" and "etag", or None if not cached.
+        """
+        if not self.enabled:
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT path, size, etag FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                finally:
+                    conn.close()
+            if not row or not os.path.exists(row[0]):
+                return None
+            return {"path": row[0], "size": row[1], "etag": row[2]}
+        except Exception as e:
+            logger.warning(f"Download cache lookup failed for {key}: {str(e)}")
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Materialize a cached file as a new temporary file.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            Optional[str]: Path to a temporary copy of the cached file, or None on a miss.
+        """
+        entry = self.lookup(key)
+        if not entry:
+            return None
+        try:
+            suffix = os.path.splitext(entry["path"])[1]
+            temp_file_path = _link_or_copy_to_tempfile(entry["path"], suffix)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                    conn.commit()
+                finally:
+                    conn.close()
+            logger.info(f"Download cache hit for {key}")
+            return temp_file_path
+        except Exception as e:
+            logger.warning(f"Download cache read failed for {key}: {str(e)}")
+            return None
+
+    def put(self, key: str, file_path: str, etag: Optional[str] = None) -> None:
+        """
+        Store a downloaded file under a key and evict old entries if needed.
+
+        Args:
+            key: Cache key.
+            file_path: Path of the freshly downloaded file (left in place).
+            etag: Optional validator stored with the entry (HTTP ETag).
+        """
+        if not self.enabled or not file_path or not os.path.exists(file_path):
+            return
+        try:
+            size = os.path.getsize(file_path)
+            if size > self.max_bytes:
+                return
+            entry_path = self._entry_path(key, os.path.splitext(file_path)[1])
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+            staging_path = f"{entry_path}.{threading.get_ident()}.tmp"
+            try:
+                os.link(file_path, staging_path)
+            except OSError:
+                shutil.copyfile(file_path, staging_path)
+            os.replace(staging_path, entry_path)
+
+            with self._lock:
+                conn = self._connect()
+                try:
+                    old = conn.execute("SELECT path FROM entries WHERE key = ?", (key,)).fetchone()
+                    if old and old[0] != entry_path and os.path.exists(old[0]):
+                        os.remove(old[0])
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, path, size, etag, last_access) VALUES (?, ?, ?, ?, ?)",
+                        (key, entry_path, size, etag, time.time())
+                    )
+                    conn.commit()
+                    self._evict(conn)
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f"Download cache write failed for {key}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in conn.execute(
+            "SELECT key, path, size FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            if os.path.exists(path):
+                os.remove(path)
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            logger.info(f"Evicted {key} from download cache")
+        conn.commit()
+
+
+def _link_or_copy_to_tempfile(source_path: str, suffix: str) -> str:
+    """Expose a cached file under a new temp path the caller is free to delete."""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        temp_file_path = temp_file.name
+    os.remove(temp_file_path)
+    try:
+        os.link(source_path, temp_file_path)
+    except OSError:
+        shutil.copyfile(source_path, temp_file_path)
+    return temp_file_path
+
+
+def drive_cache_key(file_id: str, file_metadata: Dict) -> Optional[str]:
+    """Cache key for a Drive file; None if Drive returned no version information."""
+    version = file_metadata.get('md5Checksum') or file_metadata.get('modifiedTime')
+    if not version:
+        return None
+    return f"drive:{file_id}:{version}"
+
+
+def gcs_cache_key(bucket_name: str, blob_name: str, generation) -> Optional[str]:
+    """Cache key for a GCS object generation."""
+    if not generation:
+        return None
+    return f"gcs:{bucket_name}/{blob_name}#{generation}"
+
+
+def http_cache_key(url: str) -> str:
+    """Cache key for an HTTP resource; freshness is checked with its stored ETag."""
+    return f"http:{url}"
+
+
+# Create a singleton instance
+download_cache = DownloadCache()
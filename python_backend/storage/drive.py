@@ -11,6 +11,7 @@ from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 
 from ..config import logger
+from .download_cache import download_cache, drive_cache_key
 
 _drive_service = None
 
@@ -53,6 +54,12 @@ def download_file(file_link: str) -> Optional[str]:
         if not file_metadata:
             return None
 
+        cache_key = drive_cache_key(file_id, file_metadata)
+        if cache_key:
+            cached_path = download_cache.get(cache_key)
+            if cached_path:
+                return cached_path
+
         file_name = file_metadata.get('name', 'unknown_file')
         mime_type = file_metadata.get('mimeType', 'application/octet-stream')
 
@@ -91,6 +98,8 @@ def download_file(file_link: str) -> Optional[str]:
         fh.close()
 
         logger.info(f"{log_message} to {temp_file_path}")
+        if cache_key:
+            download_cache.put(cache_key, temp_file_path)
         return temp_file_path
 
     except Exception as e:
@@ -145,7 +154,9 @@ def get_file_metadata(drive_service, file_id: str):
     """
     try:
         # Try direct access first
-        return drive_service.files().get(fileId=file_id, fields='id,name,mimeType').execute()
+        return drive_service.files().get(
+            fileId=file_id, fields='id,name,mimeType,modifiedTime,md5Checksum'
+        ).execute()
     except Exception as e:
         logger.warning(f"Error retrieving file metadata directly: {str(e)}")
         
@@ -154,7 +165,7 @@ def get_file_metadata(drive_service, file_id: str):
             results = drive_service.files().list(
                 q=f"id='{file_id}'",
                 spaces='drive',
-                fields='files(id,name,mimeType)',
+                fields='files(id,name,mimeType,modifiedTime,md5Checksum)',
                 pageToken=None
             ).execute()
             
@@ -6,6 +6,7 @@ from google.cloud import storage
 
 from ..auth.credentials import credentials_manager
 from ..config import logger, DOCUMENTS_BUCKET
+from .download_cache import download_cache, gcs_cache_key
 
 _storage_client = None
 
@@ -71,7 +72,18 @@ def download_file(file_link: str) -> Optional[str]:
 
     try:
         bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
+        # get_blob loads metadata, including the generation used as cache key
+        blob = bucket.get_blob(blob_name)
+        if blob is None:
+            logger.error(f"GCS object not found: {file_link}")
+            return None
+
+        cache_key = gcs_cache_key(bucket_name, blob_name, blob.generation)
+        if cache_key:
+            cached_path = download_cache.get(cache_key)
+            if cached_path:
+                return cached_path
+
         content_type = blob.content_type or 'application/octet-stream'
         file_extension = mimetypes.guess_extension(content_type) or '.bin'
 
@@ -80,6 +92,8 @@ def download_file(file_link: str) -> Optional[str]:
             blob.download_to_filename(temp_file_path)
 
         logger.info(f"Downloaded {blob_name} to {temp_file_path}")
+        if cache_key:
+            download_cache.put(cache_key, temp_file_path)
         return temp_file_path
     except Exception as e:
         logger.error(f"Error downloading from GCS: {str(e)}")
@@ -0,0 +1,428 @@
+"""
+Work leases for batch runners sharing one link set.
+
+A runner claims documents before processing them. A claim is a lease
+that expires after `ttl` seconds unless the runner renews it with
+heartbeats, so the documents of a crashed runner become claimable again.
+Completed documents are never handed out again within the batch. Each
+claim counts as an attempt; a document is given up after `max_attempts`.
+
+Leases are scoped by a batch id: runners started with the same id split
+the work, a new id starts over (documents already processed are still
+skipped through processed_documents).
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import threading
+from typing import Iterable, List, Optional
+
+from ..config import (
+    logger, GCP_PROJECT_ID, BQ_MIT_DATASET, BQ_LEASES_TABLE,
+    BATCH_LEASE_BACKEND, BATCH_LEASE_PATH, BATCH_LEASE_TTL, BATCH_LEASE_MAX_ATTEMPTS
+)
+
+
+def default_worker_id() -> str:
+    """Identifies this process in the leases it holds."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def default_batch_id(file_links: Iterable[str]) -> str:
+    """Batch id derived from the link set, so runners given the same links share leases."""
+    digest = hashlib.sha256("\n".join(sorted(set(file_links))).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+class LeaseStore:
+    """
+    Interface of the lease backends.
+
+    Every method takes the worker id of the caller and only touches the
+    leases of the store's batch.
+    """
+
+    def __init__(self, batch_id: str, ttl: float = BATCH_LEASE_TTL, max_attempts: int = BATCH_LEASE_MAX_ATTEMPTS):
+        self.batch_id = batch_id
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+    def claim(self, worker_id: str, file_links: List[str], limit: int) -> List[str]:
+        """
+        Lease up to `limit` of the links that are not completed, not leased
+        by a live worker and not out of attempts.
+
+        Returns:
+            List[str]: The links now leased to the worker
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, worker_id: str, file_links: List[str]) -> List[str]:
+        """
+        Extend the worker's leases on the links by `ttl`.
+
+        Returns:
+            List[str]: The links still leased to the worker (others were lost to expiry)
+        """
+        raise NotImplementedError
+
+    def release(self, worker_id: str, file_links: List[str]) -> None:
+        """Give leases back unprocessed; the claim does not count as an attempt."""
+        raise NotImplementedError
+
+    def complete(self, worker_id: str, file_links: List[str]) -> None:
+        """Mark the links as done for this batch."""
+        raise NotImplementedError
+
+    def outstanding(self, file_links: List[str]) -> List[str]:
+        """
+        Links that may still be processed by someone: not completed, and
+        either leased right now or with attempts left.
+        """
+        raise NotImplementedError
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """
+    Leases in a SQLite file, for runners on one host (or a shared disk) and tests.
+
+    Claims run in an immediate transaction, so concurrent processes never
+    lease the same document.
+    """
+
+    def __init__(self, batch_id: str, path: str = BATCH_LEASE_PATH, **kwargs):
+        super().__init__(batch_id, **kwargs)
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the lease database, creating it on first use."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Autocommit mode: transactions are started explicitly
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    batch_id TEXT NOT NULL,
+                    file_link TEXT NOT NULL,
+                    worker_id TEXT,
+                    attempts INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (batch_id, file_link)
+                )
+            """)
+            self._initialized = True
+        return conn
+
+    def _update_each(self, sql: str, params_for) -> List[int]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rowcounts = [conn.execute(sql, params).rowcount for params in params_for]
+            conn.execute("COMMIT")
+            return rowcounts
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, file_links: List[str], limit: int) -> List[str]:
+        now = time.time()
+        claimed = []
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for link in file_links:
+                if len(claimed) >= limit:
+                    break
+                cursor = conn.execute("""
+                    INSERT INTO leases (batch_id, file_link, worker_id, attempts, expires_at)
+                    VALUES (?, ?, ?, 1, ?)
+                    ON CONFLICT (batch_id, file_link) DO UPDATE SET
+                        worker_id = excluded.worker_id,
+                        attempts = leases.attempts + 1,
+                        expires_at = excluded.expires_at
+                    WHERE leases.done = 0 AND leases.expires_at < ? AND leases.attempts < ?
+                """, (self.batch_id, link, worker_id, now + self.ttl, now, self.max_attempts))
+                if cursor.rowcount:
+                    claimed.append(link)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return claimed
+
+    def heartbeat(self, worker_id: str, file_links: List[str]) -> List[str]:
+        rowcounts = self._update_each(
+            "UPDATE leases SET expires_at = ? WHERE batch_id = ? AND file_link = ? AND worker_id = ? AND done = 0",
+            [(time.time() + self.ttl, self.batch_id, link, worker_id) for link in file_links]
+        )
+        return [link for link, count in zip(file_links, rowcounts) if count]
+
+    def release(self, worker_id: str, file_links: List[str]) -> None:
+        self._update_each(
+            "UPDATE leases SET worker_id = NULL, expires_at = 0, attempts = MAX(attempts - 1, 0) "
+            "WHERE batch_id = ? AND file_link = ? AND worker_id = ? AND done = 0",
+            [(self.batch_id, link, worker_id) for link in file_links]
+        )
+
+    def complete(self, worker_id: str, file_links: List[str]) -> None:
+        self._update_each(
+            "UPDATE leases SET done = 1 WHERE batch_id = ? AND file_link = ?",
+            [(self.batch_id, link) for link in file_links]
+        )
+
+    def outstanding(self, file_links: List[str]) -> List[str]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            finished = {
+                row[0] for row in conn.execute(
+                    "SELECT file_link FROM leases WHERE batch_id = ? "
+                    "AND (done = 1 OR (expires_at < ? AND attempts >= ?))",
+                    (self.batch_id, now, self.max_attempts)
+                )
+            }
+        finally:
+            conn.close()
+        return [link for link in file_links if link not in finished]
+
+
+class BigQueryLeaseStore(LeaseStore):
+    """
+    Leases in a BigQuery table, for runners on several machines.
+
+    The table has no key, so concurrent INSERTs could create the same
+    lease twice. Lease rows are therefore seeded unclaimed first (an
+    idempotent insert of the missing links), and claims only UPDATE
+    existing rows, tagging them with a claim id that is then read back.
+    BigQuery rejects one of two concurrent UPDATEs touching the same rows,
+    so two claims never take the same document; a duplicate seed row is
+    harmless because every claim updates all rows of a link. Expiry uses
+    BigQuery's clock, so the runners' clocks do not matter. Claims that
+    lose a conflict are retried a few times; other errors are logged and
+    treated as "nothing claimed", and the runner retries later.
+    """
+
+    # Attempts of a claim UPDATE that lost a concurrent-update conflict
+    claim_retries = 3
+
+    def __init__(self, batch_id: str, project_id: str = GCP_PROJECT_ID, dataset_id: str = BQ_MIT_DATASET,
+                 table_id: str = BQ_LEASES_TABLE, **kwargs):
+        super().__init__(batch_id, **kwargs)
+        self.table = f"{project_id}.{dataset_id}.{table_id}"
+        self._table_exists = False
+        self._seeded = set()
+
+    def _query(self, query: str, **params):
+        """Run a parameterized query (STRING arrays for lists) and return its rows."""
+        from google.cloud import bigquery
+        from .bigquery import get_bigquery_client
+
+        bigquery_client = get_bigquery_client()
+        if not bigquery_client:
+            raise RuntimeError("BigQuery client not initialized")
+        if not self._table_exists:
+            bigquery_client.query(f"""
+            CREATE TABLE IF NOT EXISTS `{self.table}` (
+                batch_id STRING NOT NULL,
+                file_link STRING NOT NULL,
+                worker_id STRING,
+                claim_id STRING,
+                attempts INT64 NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                done BOOL NOT NULL
+            )
+            CLUSTER BY batch_id, file_link
+            """).result()
+            self._table_exists = True
+
+        query_parameters = [bigquery.ScalarQueryParameter("batch_id", "STRING", self.batch_id)]
+        for name, value in params.items():
+            if isinstance(value, list):
+                query_parameters.append(bigquery.ArrayQueryParameter(name, "STRING", value))
+            elif isinstance(value, int):
+                query_parameters.append(bigquery.ScalarQueryParameter(name, "INT64", value))
+            else:
+                query_parameters.append(bigquery.ScalarQueryParameter(name, "STRING", value))
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+        return list(bigquery_client.query(query, job_config=job_config).result())
+
+    def _seed(self, file_links: List[str]) -> None:
+        """Insert unclaimed lease rows for the links this store has not seen yet."""
+        missing = [link for link in file_links if link not in self._seeded]
+        if not missing:
+            return
+        self._query(f"""
+        INSERT INTO `{self.table}` (batch_id, file_link, worker_id, claim_id, attempts, expires_at, done)
+        SELECT @batch_id, link, NULL, NULL, 0, TIMESTAMP_SECONDS(0), FALSE
+        FROM UNNEST(@file_links) AS link
+        WHERE link NOT IN (SELECT file_link FROM `{self.table}` WHERE batch_id = @batch_id)
+        """, file_links=missing)
+        self._seeded.update(missing)
+
+    def claim(self, worker_id: str, file_links: List[str], limit: int) -> List[str]:
+        if not file_links or limit <= 0:
+            return []
+        try:
+            self._seed(file_links)
+        except Exception as e:
+            logger.error(f"Error seeding document leases: {str(e)}")
+            return []
+        for attempt in range(1, self.claim_retries + 1):
+            claim_id = uuid.uuid4().hex
+            try:
+                self._query(f"""
+                UPDATE `{self.table}`
+                SET worker_id = @worker_id, claim_id = @claim_id, attempts = attempts + 1,
+                    expires_at = TIMESTAMP_ADD(CURRENT_TIMESTAMP(), INTERVAL @ttl SECOND)
+                WHERE batch_id = @batch_id
+                  AND NOT done AND expires_at < CURRENT_TIMESTAMP() AND attempts < @max_attempts
+                  AND file_link IN (
+                    SELECT DISTINCT file_link FROM `{self.table}`
+                    WHERE batch_id = @batch_id AND file_link IN UNNEST(@file_links)
+                      AND NOT done AND expires_at < CURRENT_TIMESTAMP() AND attempts < @max_attempts
+                    LIMIT @limit
+                  )
+                """, file_links=file_links, limit=limit, worker_id=worker_id, claim_id=claim_id,
+                            ttl=int(self.ttl), max_attempts=self.max_attempts)
+                rows = self._query(
+                    f"SELECT DISTINCT file_link FROM `{self.table}` WHERE batch_id = @batch_id AND claim_id = @claim_id",
+                    claim_id=claim_id
+                )
+                return [row.file_link for row in rows]
+            except Exception as e:
+                if "concurrent update" in str(e).lower() and attempt < self.claim_retries:
+                    time.sleep(attempt)
+                    continue
+                logger.error(f"Error claiming document leases: {str(e)}")
+                return []
+        return []
+
+    def heartbeat(self, worker_id: str, file_links: List[str]) -> List[str]:
+        if not file_links:
+            return []
+        try:
+            self._query(f"""
+            UPDATE `{self.table}`
+            SET expires_at = TIMESTAMP_ADD(CURRENT_TIMESTAMP(), INTERVAL @ttl SECOND)
+            WHERE batch_id = @batch_id AND worker_id = @worker_id AND NOT done
+              AND file_link IN UNNEST(@file_links)
+            """, file_links=file_links, worker_id=worker_id, ttl=int(self.ttl))
+            rows = self._query(f"""
+            SELECT DISTINCT file_link FROM `{self.table}`
+            WHERE batch_id = @batch_id AND worker_id = @worker_id AND NOT done
+              AND file_link IN UNNEST(@file_links)
+            """, file_links=file_links, worker_id=worker_id)
+            return [row.file_link for row in rows]
+        except Exception as e:
+            # Keep the leases: they are still valid until they expire
+            logger.error(f"Error renewing document leases: {str(e)}")
+            return list(file_links)
+
+    def release(self, worker_id: str, file_links: List[str]) -> None:
+        if not file_links:
+            return
+        try:
+            self._query(f"""
+            UPDATE `{self.table}`
+            SET worker_id = NULL, expires_at = TIMESTAMP_SECONDS(0), attempts = GREATEST(attempts - 1, 0)
+            WHERE batch_id = @batch_id AND worker_id = @worker_id AND NOT done
+              AND file_link IN UNNEST(@file_links)
+            """, file_links=file_links, worker_id=worker_id)
+        except Exception as e:
+            logger.error(f"Error releasing document leases: {str(e)}")
+
+    def complete(self, worker_id: str, file_links: List[str]) -> None:
+        if not file_links:
+            return
+        try:
+            self._query(f"""
+            UPDATE `{self.table}` SET done = TRUE
+            WHERE batch_id = @batch_id AND file_link IN UNNEST(@file_links)
+            """, file_links=file_links)
+        except Exception as e:
+            logger.error(f"Error completing document leases: {str(e)}")
+
+    def outstanding(self, file_links: List[str]) -> List[str]:
+        if not file_links:
+            return []
+        try:
+            rows = self._query(f"""
+            SELECT file_link FROM `{self.table}`
+            WHERE batch_id = @batch_id AND file_link IN UNNEST(@file_links)
+              AND (done OR (expires_at < CURRENT_TIMESTAMP() AND attempts >= @max_attempts))
+            """, file_links=file_links, max_attempts=self.max_attempts)
+        except Exception as e:
+            logger.error(f"Error reading document leases: {str(e)}")
+            return list(file_links)
+        finished = {row.file_link for row in rows}
+        return [link for link in file_links if link not in finished]
+
+
+class LeaseHeartbeat:
+    """
+    Background thread renewing the leases a worker holds every `interval`
+    seconds (a third of the TTL by default).
+    """
+
+    def __init__(self, store: LeaseStore, worker_id: str, interval: Optional[float] = None):
+        self.store = store
+        self.worker_id = worker_id
+        self.interval = interval if interval is not None else store.ttl / 3
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, file_links: Iterable[str]) -> None:
+        with self._lock:
+            self._held.update(file_links)
+
+    def discard(self, file_links: Iterable[str]) -> None:
+        with self._lock:
+            self._held.difference_update(file_links)
+
+    def held(self) -> List[str]:
+        with self._lock:
+            return list(self._held)
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            held = self.held()
+            if not held:
+                continue
+            renewed = set(self.store.heartbeat(self.worker_id, held))
+            lost = [link for link in held if link not in renewed]
+            if lost:
+                logger.warning(f"Lost {len(lost)} document leases (expired before renewal), "
+                               f"another worker may process them too")
+                self.discard(lost)
+
+
+def get_lease_store(batch_id: str, backend: str = BATCH_LEASE_BACKEND) -> Optional[LeaseStore]:
+    """
+    Lease store of the configured backend.
+
+    Returns:
+        The store, or None if leases are disabled ("none")
+    """
+    if backend == "sqlite":
+        return SQLiteLeaseStore(batch_id)
+    if backend == "bigquery":
+        return BigQueryLeaseStore(batch_id)
+    if backend != "none":
+        raise ValueError(f"Unknown lease backend: {backend}")
+    return None
@@ -0,0 +1,292 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from google.cloud import bigquery
+
+from ..config import (
+    logger, GCP_PROJECT_ID, BQ_MIT_DATASET,
+    PROJECTS_SNAPSHOT_PATH, PROJECTS_SNAPSHOT_REFRESH_INTERVAL,
+    PROJECTS_SNAPSHOT_FULL_REFRESH_INTERVAL, PROJECTS_SNAPSHOT_OVERLAP
+)
+from .bigquery import get_bigquery_client, latest_analyses_query
+
+# Column holding when each row's document was last processed successfully
+PROCESSED_AT_COLUMN = "_processed_at"
+
+
+class ProjectSnapshot:
+    """
+    Columnar in-memory copy of final_results_engagement, persisted as Parquet.
+
+    There is one row per file_id, its latest analysis as picked by
+    latest_analyses_query, carrying the processed_at of its document
+    (file_id == file_link in processed_documents). The highest processed_at
+    seen is the watermark: refreshes only pull rows processed after it and
+    upsert them by file_id, so a refresh costs as much as the number of new
+    analyses. A full rebuild every `full_refresh_interval` seconds drops
+    rows deleted upstream.
+    If BigQuery is unreachable the last snapshot keeps being served.
+    """
+
+    def __init__(self,
+                 path: str = PROJECTS_SNAPSHOT_PATH,
+                 refresh_interval: float = PROJECTS_SNAPSHOT_REFRESH_INTERVAL,
+                 full_refresh_interval: float = PROJECTS_SNAPSHOT_FULL_REFRESH_INTERVAL,
+                 overlap: float = PROJECTS_SNAPSHOT_OVERLAP,
+                 project_id: str = GCP_PROJECT_ID,
+                 dataset_id: str = BQ_MIT_DATASET):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.overlap = overlap
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self._table = None
+        self._watermark: Optional[datetime] = None
+        self._full_refreshed_at = 0.0
+        # No refresh is due before this time (time.monotonic), after a refresh or a failed one
+        self._next_refresh_at = 0.0
+        self._refresh_error: Optional[Exception] = None
+        self._refreshing = False
+        self._loaded = False
+        # Guards the snapshot state; never held during a BigQuery query
+        self._lock = threading.Lock()
+        # Serializes refreshes (reentrant: _refresh_if_due holds it around refresh)
+        self._refresh_lock = threading.RLock()
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """processed_at of the most recently processed row in the snapshot."""
+        return self._watermark
+
+    def _load(self) -> None:
+        """Load the persisted snapshot, if any, into memory."""
+        import pyarrow.parquet as pq
+
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            table = pq.read_table(self.path)
+            metadata = table.schema.metadata or {}
+            if b"watermark" in metadata:
+                self._watermark = datetime.fromisoformat(metadata[b"watermark"].decode("utf-8"))
+            self._full_refreshed_at = float(metadata.get(b"full_refreshed_at", b"0"))
+            self._table = table.replace_schema_metadata(None)
+            # Serve it right away; the next refresh is due after refresh_interval
+            self._next_refresh_at = time.monotonic() + self.refresh_interval
+            logger.info(f"Loaded project snapshot with {table.num_rows} rows from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load project snapshot {self.path}: {str(e)}")
+
+    def _save(self) -> None:
+        """Persist the snapshot with its watermark, atomically."""
+        import pyarrow.parquet as pq
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            metadata = {b"full_refreshed_at": str(self._full_refreshed_at).encode("utf-8")}
+            if self._watermark is not None:
+                metadata[b"watermark"] = self._watermark.isoformat().encode("utf-8")
+            temp_path = f"{self.path}.tmp"
+            pq.write_table(self._table.replace_schema_metadata(metadata), temp_path, compression="zstd")
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist project snapshot: {str(e)}")
+
+    def query_rows(self, since: Optional[datetime] = None):
+        """
+        Read the latest analysis of each document in final_results_engagement
+        (see latest_analyses_query) with its processed_at.
+
+        Args:
+            since: Only rows whose document was processed after this time (None for all rows)
+
+        Returns:
+            pyarrow.Table
+        """
+        bigquery_client = get_bigquery_client()
+        if not bigquery_client:
+            raise RuntimeError("BigQuery client not initialized")
+
+        dataset = f"{self.project_id}.{self.dataset_id}"
+        query = f"""
+        WITH processed AS (
+            SELECT file_link, MAX(processed_at) AS processed_at
+            FROM `{dataset}.processed_documents`
+            WHERE status = 'success'{" AND processed_at > @since" if since else ""}
+            GROUP BY file_link
+        )
+        SELECT results.*, processed.processed_at AS {PROCESSED_AT_COLUMN}
+        FROM ({latest_analyses_query(f"{dataset}.final_results_engagement")}) AS results
+        {"JOIN" if since else "LEFT JOIN"} processed ON results.file_id = processed.file_link
+        ORDER BY results.file_id
+        """
+        params = [bigquery.ScalarQueryParameter("since", "TIMESTAMP", since)] if since else []
+        job_config = bigquery.QueryJobConfig(query_parameters=params)
+        return bigquery_client.query(query, job_config=job_config).to_arrow(create_bqstorage_client=True)
+
+    def _max_processed_at(self, table) -> Optional[datetime]:
+        import pyarrow.compute as pc
+
+        if table.num_rows == 0:
+            return None
+        return pc.max(table.column(PROCESSED_AT_COLUMN)).as_py()
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Bring the snapshot up to date with BigQuery.
+
+        The query runs without holding the snapshot lock, so readers keep
+        getting the current table meanwhile; the new table is swapped in
+        at the end. Refreshes run one at a time. A failed refresh is not
+        retried by get_table before refresh_interval seconds.
+
+        Args:
+            full: Rebuild from the whole table instead of pulling rows after the watermark.
+
+        Returns:
+            int: Number of rows read from BigQuery
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        with self._refresh_lock:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                # Only refreshes replace these, and they are serialized
+                current, watermark = self._table, self._watermark
+                full = (full or current is None or watermark is None
+                        or time.time() - self._full_refreshed_at > self.full_refresh_interval)
+
+            try:
+                if full:
+                    table = self.query_rows()
+                else:
+                    table = self.query_rows(watermark - timedelta(seconds=self.overlap))
+                    if table.num_rows and not table.schema.equals(current.schema):
+                        logger.info("final_results_engagement schema changed, rebuilding the project snapshot")
+                        table = self.query_rows()
+                        full = True
+            except Exception as e:
+                with self._lock:
+                    self._refresh_error = e
+                    self._next_refresh_at = time.monotonic() + self.refresh_interval
+                raise
+
+            full_refreshed_at = self._full_refreshed_at
+            if full:
+                current = table.combine_chunks()
+                watermark = self._max_processed_at(table)
+                full_refreshed_at = time.time()
+            elif table.num_rows:
+                # Upsert by file_id: replace every row of the re-processed documents
+                updated_ids = table.column("file_id").combine_chunks()
+                kept = current.filter(pc.invert(pc.is_in(current.column("file_id"), value_set=updated_ids)))
+                current = pa.concat_tables([kept, table]).sort_by("file_id").combine_chunks()
+                watermark = max(watermark, self._max_processed_at(table))
+
+            with self._lock:
+                self._table, self._watermark = current, watermark
+                self._full_refreshed_at = full_refreshed_at
+                self._refresh_error = None
+                self._next_refresh_at = time.monotonic() + self.refresh_interval
+            if full or table.num_rows:
+                self._save()
+            logger.info(f"Project snapshot {'rebuilt' if full else 'refreshed'}: {table.num_rows} rows read, "
+                        f"{current.num_rows} rows, watermark {watermark}")
+            return table.num_rows
+
+    def _refresh_due(self) -> bool:
+        """Whether get_table should refresh (caller holds the lock)."""
+        return time.monotonic() >= self._next_refresh_at
+
+    def _refresh_if_due(self) -> None:
+        """Refresh unless another caller did while this one waited for its turn."""
+        with self._refresh_lock:
+            with self._lock:
+                due = self._refresh_due()
+            if due:
+                self.refresh()
+
+    def _refresh_in_background(self) -> None:
+        """Start a background refresh unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh_if_due()
+            except Exception as e:
+                logger.warning(f"Project snapshot refresh failed, serving the last snapshot: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="project-snapshot-refresh", daemon=True).start()
+
+    def get_changes(self, since: datetime):
+        """
+        Rows whose document was processed after `since`, minus the overlap.
+
+        Rows can become visible in BigQuery after rows with a later
+        processed_at; the snapshot picks them up through its own `overlap`
+        window, so changes are read from `since - overlap` too. Rows near
+        the watermark are therefore returned again on the next call, and
+        callers must dedupe by file_id.
+
+        Args:
+            since: Timezone-aware timestamp, typically a watermark returned earlier
+
+        Returns:
+            Tuple of (pyarrow.Table of the changed rows, current watermark)
+        """
+        import pyarrow.compute as pc
+
+        self.get_table()
+        # Read both under the lock so the watermark matches the table
+        with self._lock:
+            table, watermark = self._table, self._watermark
+        since = since - timedelta(seconds=self.overlap)
+        return table.filter(pc.greater(table.column(PROCESSED_AT_COLUMN), since)), watermark
+
+    def get_table(self):
+        """
+        Return the snapshot.
+
+        A snapshot older than refresh_interval is returned as is while one
+        background refresh brings it up to date. Only the first call, with
+        no snapshot yet, waits for BigQuery.
+
+        Returns:
+            pyarrow.Table sorted by file_id, including the PROCESSED_AT_COLUMN column
+
+        Raises:
+            Exception: If there is no snapshot yet and BigQuery cannot be read
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            table, due = self._table, self._refresh_due()
+        if table is not None:
+            # Serve the current snapshot right away, refresh it in the background
+            if due:
+                self._refresh_in_background()
+            return table
+
+        # Nothing to serve yet: concurrent first callers share one query
+        self._refresh_if_due()
+        with self._lock:
+            if self._table is None:
+                raise RuntimeError(f"No project snapshot yet: {str(self._refresh_error)}")
+            return self._table
+
+
+# Create a singleton instance
+project_snapshot = ProjectSnapshot()
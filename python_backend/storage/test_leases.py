@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add the project root to the Python path to ensure imports work correctly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from python_backend.storage.leases import SQLiteLeaseStore
+
+LINKS = [f"gs://bucket/fa/{i:04d}.pdf" for i in range(200)]
+
+
+def make_store(directory, **kwargs):
+    return SQLiteLeaseStore("batch", path=os.path.join(directory, "leases.sqlite"), **kwargs)
+
+
+def test_concurrent_claims_split_links_without_duplicates():
+    """Workers claiming concurrently (one connection each) never get the same link."""
+    with tempfile.TemporaryDirectory() as directory:
+        claimed = {}
+
+        def worker(worker_id):
+            store = make_store(directory)
+            mine = []
+            while True:
+                links = store.claim(worker_id, LINKS, 7)
+                if not links:
+                    break
+                mine.extend(links)
+                store.complete(worker_id, links)
+            claimed[worker_id] = mine
+
+        threads = [threading.Thread(target=worker, args=(f"worker-{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_claimed = [link for links in claimed.values() for link in links]
+        assert sorted(all_claimed) == sorted(LINKS)
+        assert make_store(directory).outstanding(LINKS) == []
+
+
+def test_expired_leases_are_reclaimed():
+    """A crashed worker's leases go to another worker once they expire, not before."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory, ttl=0.2)
+        assert store.claim("crashed", LINKS[:3], 3) == LINKS[:3]
+        assert store.claim("survivor", LINKS[:3], 3) == []
+
+        time.sleep(0.3)
+        assert store.claim("survivor", LINKS[:3], 3) == LINKS[:3]
+        # The crashed worker cannot renew what it lost
+        assert store.heartbeat("crashed", LINKS[:3]) == []
+        assert store.heartbeat("survivor", LINKS[:3]) == LINKS[:3]
+
+
+def test_heartbeat_keeps_leases():
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory, ttl=0.3)
+        store.claim("worker", LINKS[:1], 1)
+        for _ in range(3):
+            time.sleep(0.15)
+            assert store.heartbeat("worker", LINKS[:1]) == LINKS[:1]
+        assert store.claim("other", LINKS[:1], 1) == []
+
+
+def test_links_are_given_up_after_max_attempts():
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory, ttl=0.1, max_attempts=2)
+        for attempt in range(2):
+            assert store.claim(f"worker-{attempt}", LINKS[:1], 1) == LINKS[:1]
+            # Still outstanding while leased, even on the last attempt
+            assert store.outstanding(LINKS[:1]) == LINKS[:1]
+            time.sleep(0.15)
+
+        assert store.claim("worker-2", LINKS[:1], 1) == []
+        assert store.outstanding(LINKS[:1]) == []
+
+
+def test_release_does_not_count_as_an_attempt():
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory, max_attempts=1)
+        assert store.claim("worker", LINKS[:2], 2) == LINKS[:2]
+        store.release("worker", LINKS[:2])
+
+        # Claimable again right away, despite max_attempts=1
+        assert store.claim("other", LINKS[:2], 2) == LINKS[:2]
+        store.complete("other", LINKS[:1])
+        assert store.outstanding(LINKS[:2]) == LINKS[1:2]
+        assert store.claim("third", LINKS[:2], 2) == []
+
+
+if __name__ == "__main__":
+    test_concurrent_claims_split_links_without_duplicates()
+    test_expired_leases_are_reclaimed()
+    test_heartbeat_keeps_leases()
+    test_links_are_given_up_after_max_attempts()
+    test_release_does_not_count_as_an_attempt()
+    print("All lease tests passed")
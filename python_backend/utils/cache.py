@@ -0,0 +1,134 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Optional, Dict
+
+from python_backend.config import logger
+
+
+class SQLiteCache:
+    """
+    Small persistent key-value cache backed by a single SQLite file.
+
+    Values are stored zlib-compressed. Entries can expire after `ttl`
+    seconds, and the cache can be bounded to `max_bytes` of compressed data,
+    evicting least-recently-used entries first. Hit and miss counters are
+    kept per instance so callers can report how much work the cache saved.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_bytes: Optional[int] = None,
+                 compress_level: int = 6):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database, creating it on first use."""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL
+                )
+            """)
+            # Columns added after the first release of the cache
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            for column in ("size", "created_at", "last_access"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {column} REAL NOT NULL DEFAULT 0")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a value.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The stored bytes, or None on a miss, an expired entry or a read error.
+        """
+        row = None
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    now = time.time()
+                    if row is not None and self.ttl is not None and row[1] < now - self.ttl:
+                        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        conn.commit()
+                        row = None
+                    elif row is not None and self.max_bytes is not None:
+                        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.path}: {str(e)}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return zlib.decompress(row[0])
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store a value, replacing any previous value for the key.
+
+        Args:
+            key: Cache key.
+            value: Bytes to store.
+        """
+        try:
+            compressed = zlib.compress(value, self.compress_level)
+            now = time.time()
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, sqlite3.Binary(compressed), len(compressed), now, now)
+                    )
+                    conn.commit()
+                    if self.max_bytes is not None:
+                        self._evict(conn)
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.path}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries, then least recently used ones until the cache fits in max_bytes."""
+        if self.ttl is not None:
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+        conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for this process."""
+        return {"hits": self.hits, "misses": self.misses}
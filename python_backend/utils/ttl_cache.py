@@ -0,0 +1,96 @@
+import time
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from python_backend.config import logger
+
+
+class TTLCache:
+    """
+    In-process cache with a time-to-live, stale-while-revalidate and single-flight loads.
+
+    - A value younger than `ttl` seconds is served as is.
+    - A value older than `ttl` but younger than `ttl + stale_ttl` is served
+      immediately while one background thread refreshes it.
+    - On a miss, concurrent callers share a single call to the loader
+      instead of each starting their own.
+    - With `max_entries` set, the oldest entries are dropped once the cache
+      holds more keys than that.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_entries: Optional[int] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], future: Future) -> None:
+        """Run the loader as the single flight for `key` and publish its outcome."""
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._inflight.pop(key, None)
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k][0])
+                for old_key in oldest[:len(self._entries) - self.max_entries]:
+                    del self._entries[old_key]
+        future.set_result(value)
+
+    def _start_flight(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return the in-flight load for `key`, creating it if needed (caller holds the lock)."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._inflight[key] = future
+        return future, True
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value, loading it with `loader` if it is missing or expired.
+
+        Args:
+            key: Cache key.
+            loader: Zero-argument callable producing the value. Exceptions are
+                    raised to every caller waiting on that load and nothing is cached.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[0] if entry else None
+            if entry and age < self.ttl:
+                return entry[1]
+            future, is_leader = self._start_flight(key)
+
+        if entry and age < self.ttl + self.stale_ttl:
+            # Serve stale, refresh in the background
+            if is_leader:
+                def refresh():
+                    self._load(key, loader, future)
+                    if future.exception() is not None:
+                        logger.warning(f"Background refresh failed for {key}: {str(future.exception())}")
+                threading.Thread(target=refresh, name="ttl-cache-refresh", daemon=True).start()
+            return entry[1]
+
+        if is_leader:
+            self._load(key, loader, future)
+        return future.result()
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop one entry, or every entry if no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)